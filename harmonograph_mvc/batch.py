@@ -0,0 +1,136 @@
+"""Headless batch renderer.
+
+Renders a catalog of harmonograph parameter sets across a process pool without starting Qt:
+
+    python -m harmonograph_mvc.batch catalog.json --out renders --workers 4
+
+The catalog is either a JSON list of objects with "pendulums" as nested [pendulum][axis][amplitude, dampening,
+frequency, phase] lists, or a CSV file with one column per parameter named like amplitude_1x, dampening_2y, ...
+Both also take name, t_start, t_end and t_samples, and may override size, min_alpha and steps per job. Every result
+is written as a PNG or a raw .npy intensity array next to a manifest.json holding the per-job timings.
+"""
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import get_context
+import argparse
+import csv
+import json
+import os
+import re
+import time
+
+import numpy as np
+
+from harmonograph_mvc.models.harmonograph import Harmonograph, HarmonographParams
+from harmonograph_mvc.models.renderer import ImageBlender
+from harmonograph_mvc.utils.png import write_png
+
+PARAM_NAMES = ['amplitude', 'dampening', 'frequency', 'phase']
+AXES = 'xyz'
+CSV_PARAM_COLUMN = re.compile(rf"^({'|'.join(PARAM_NAMES)})_(\d+)([{AXES}])$")
+
+
+def params_from_csv_row(row: dict) -> list:
+    """Builds the nested pendulum parameter lists from the amplitude_1x style columns of a CSV row."""
+    values = {}
+    for column, value in row.items():
+        match = CSV_PARAM_COLUMN.match(column)
+        if match:
+            name, pendulum, axis = match.groups()
+            values[int(pendulum) - 1, AXES.index(axis), PARAM_NAMES.index(name)] = float(value)
+
+    pendulums = np.zeros(np.max(list(values), axis=0) + 1)
+    for index, value in values.items():
+        pendulums[index] = value
+    return pendulums.tolist()
+
+
+def load_catalog(path: str) -> list[dict]:
+    """Reads the parameter sets of a JSON or CSV catalog into job dictionaries."""
+    if path.endswith('.csv'):
+        with open(path, newline='') as file:
+            rows = list(csv.DictReader(file))
+        jobs = [{**{key: value for key, value in row.items() if not CSV_PARAM_COLUMN.match(key)},
+                 'pendulums': params_from_csv_row(row)} for row in rows]
+    else:
+        with open(path) as file:
+            jobs = json.load(file)
+
+    for i, job in enumerate(jobs):
+        job.setdefault('name', f'harmonograph_{i:04d}')
+    return jobs
+
+
+def render_job(job: dict, out_dir: str, output_format: str, size: int, min_alpha: int, steps: int) -> dict:
+    """Renders a single catalog entry and writes it to out_dir. Returns its manifest entry."""
+    start = time.perf_counter()
+    size = int(job.get('size', size))
+    params = HarmonographParams(job['pendulums'], job['t_start'], job['t_end'], job['t_samples'])
+    blender = ImageBlender(size, size, int(job.get('min_alpha', min_alpha)), int(job.get('steps', steps)))
+    blender.accumulate_harmonograph(Harmonograph(params), size - 1)
+    image = blender.get_image()
+    render_time = time.perf_counter() - start
+
+    path = os.path.join(out_dir, f"{job['name']}.{output_format}")
+    if output_format == 'png':
+        write_png(path, image)
+    else:
+        np.save(path, image)
+
+    return {
+        'name': job['name'],
+        'path': path,
+        'size': size,
+        't_samples': params.t_samples,
+        'render_seconds': render_time,
+        'write_seconds': time.perf_counter() - start - render_time,
+        'total_seconds': time.perf_counter() - start,
+    }
+
+
+def run_batch(jobs: list[dict], out_dir: str, output_format: str = 'png', workers: int = None, size: int = 1000,
+              min_alpha: int = 25, steps: int = 45) -> dict:
+    """Renders every job across a pool of worker processes and writes manifest.json to out_dir."""
+    os.makedirs(out_dir, exist_ok=True)
+    start = time.perf_counter()
+    results = []
+    with ProcessPoolExecutor(workers, mp_context=get_context('spawn')) as pool:
+        futures = {pool.submit(render_job, job, out_dir, output_format, size, min_alpha, steps): job for job in jobs}
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as error:
+                result = {'name': futures[future]['name'], 'error': repr(error)}
+            results.append(result)
+            print(json.dumps(result))
+
+    results.sort(key=lambda result: result['name'])
+    manifest = {
+        'jobs': results,
+        'workers': workers or os.cpu_count(),
+        'wall_seconds': time.perf_counter() - start,
+    }
+    with open(os.path.join(out_dir, 'manifest.json'), 'w') as file:
+        json.dump(manifest, file, indent=2)
+    return manifest
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('catalog', help="JSON or CSV file of parameter sets")
+    parser.add_argument('--out', default='renders', help="output directory")
+    parser.add_argument('--format', choices=['png', 'npy'], default='png', help="PNG image or raw intensity array")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes, defaults to the CPU count")
+    parser.add_argument('--size', type=int, default=1000, help="image width and height in pixels")
+    parser.add_argument('--min-alpha', type=int, default=25)
+    parser.add_argument('--steps', type=int, default=45)
+    args = parser.parse_args(argv)
+
+    manifest = run_batch(load_catalog(args.catalog), args.out, args.format, args.workers, args.size,
+                         args.min_alpha, args.steps)
+    failed = sum('error' in job for job in manifest['jobs'])
+    print(f"Rendered {len(manifest['jobs']) - failed} of {len(manifest['jobs'])} jobs "
+          f"in {manifest['wall_seconds']:.2f} seconds.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""Benchmark of arc-length adaptive against uniform time sampling.
+
+Renders every case with uniform samples and, for every spacing, with adaptive samples that far apart in pixels and
+with as many uniform samples as the adaptive sampler placed. Each image is compared with a densely sampled
+reference:
+
+    python -m harmonograph_mvc.benchmarks.adaptive_sampling --size 1000 --spacing 1 0.5
+
+Differences are the mean absolute intensity difference and the fraction of pixels differing by more than one alpha
+step from the reference.
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from harmonograph_mvc.benchmarks.common import CASES, MIN_ALPHA, STEPS, best_time, render
+from harmonograph_mvc.models.harmonograph import Harmonograph, HarmonographParams
+
+CASE_NAMES = ('lissajous', 'spiral')
+
+
+def timed_render(params: HarmonographParams, size: int):
+    """Returns the intensities of the parameters rendered at the given size and the time it took."""
+    return best_time(lambda: render(Harmonograph(params), size), 1)
+
+
+def difference(image: np.ndarray, reference: np.ndarray) -> dict:
+    delta = np.abs(image.astype(np.int16) - reference)
+    return {'mean': float(delta.mean()), 'pixels': float((delta > (255 - MIN_ALPHA) / STEPS).mean())}
+
+
+def run_case(pendulums, t_samples: int, reference_samples: int, size: int, spacings) -> dict:
+    uniform = HarmonographParams(pendulums, 0, 2000, t_samples)
+    reference, _ = timed_render(HarmonographParams(pendulums, 0, 2000, reference_samples), size)
+    uniform_image, uniform_seconds = timed_render(uniform, size)
+    results = {'uniform': {'samples': t_samples, 'seconds': uniform_seconds, **difference(uniform_image, reference)}}
+
+    for spacing in spacings:
+        start = time.perf_counter()
+        times = Harmonograph(uniform).arc_length_times(size - 1, spacing)
+        sampling_seconds = time.perf_counter() - start
+        adaptive_image, adaptive_seconds = timed_render(HarmonographParams(pendulums, 0, 2000, t_samples, times), size)
+        matched_image, matched_seconds = timed_render(HarmonographParams(pendulums, 0, 2000, len(times)), size)
+
+        results[f'adaptive {spacing:g}px'] = {'samples': len(times), 'seconds': sampling_seconds + adaptive_seconds,
+                                              **difference(adaptive_image, reference)}
+        results[f'uniform {len(times)}'] = {'samples': len(times), 'seconds': matched_seconds,
+                                            **difference(matched_image, reference)}
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--size', type=int, default=1000, help="image width and height in pixels")
+    parser.add_argument('--samples', type=int, default=1000000, help="uniform sample count")
+    parser.add_argument('--reference-samples', type=int, default=8000000)
+    parser.add_argument('--spacing', type=float, nargs='+', default=[1.0, 0.5], help="adaptive sample spacings")
+    parser.add_argument('--json', help="file to write the results to")
+    args = parser.parse_args(argv)
+
+    results = {}
+    print(f"{'case':>10} {'sampling':>16} {'samples':>9} {'seconds':>8} {'mean diff':>10} {'pixels off':>10}")
+    for name in CASE_NAMES:
+        results[name] = run_case(CASES[name], args.samples, args.reference_samples, args.size, args.spacing)
+        uniform = results[name]['uniform']
+        for sampling, result in results[name].items():
+            print(f"{name:>10} {sampling:>16} {result['samples']:>9} {result['seconds']:>8.3f} "
+                  f"{result['mean']:>10.2f} {result['pixels']:>10.2%}")
+            if sampling.startswith('adaptive'):
+                print(f"{name:>10} {sampling} uses {result['samples'] / uniform['samples']:.1%} of the samples and "
+                      f"{result['seconds'] / uniform['seconds']:.1%} of the time of uniform sampling")
+
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,40 @@
+"""Parameter sets, alpha settings and helpers shared by the benchmarks, so that their results stay comparable."""
+import time
+
+import numpy as np
+
+from harmonograph_mvc.models.harmonograph import Harmonograph
+from harmonograph_mvc.models.renderer import ImageBlender
+
+CASES = {
+    # Near-rational frequency ratios that slowly fill the image, moving at a nearly constant speed
+    'lissajous': [[[1.0, 0.0005, 1.0, 0.0], [1.0, 0.0005, 1.01, 1.5]],
+                  [[0.8, 0.001, 2.02, 0.3], [0.7, 0.0007, 3.0, 0.0]]],
+    # A decaying spiral that slows down towards its centre
+    'spiral': [[[1.0, 0.002, 1.0, 0.0], [1.0, 0.002, 1.0, 1.5708]],
+               [[0.3, 0.001, 0.5, 0.0], [0.3, 0.001, 0.5, 1.5708]]],
+    # High frequencies that advance the phase by a lot per sample
+    'fast': [[[1.0, 0.0001, 30.0, 0.0], [1.0, 0.0001, 30.3, 1.5]],
+             [[0.5, 0.0002, 61.0, 0.3], [0.5, 0.0002, 90.0, 0.0]],
+             [[0.2, 0.0003, 7.0, 1.0], [0.2, 0.0003, 7.0, 2.0]]],
+}
+MIN_ALPHA = 25
+STEPS = 45
+
+
+def best_time(run, repeat: int):
+    """Returns the result of run and the best time in seconds of calling it repeat times."""
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = run()
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def render(harmonograph: Harmonograph, size: int, mode: str = 'lines') -> np.ndarray:
+    """Returns the intensities of the harmonograph rendered into a size by size image."""
+    blender = ImageBlender(size, size, MIN_ALPHA, STEPS, mode=mode)
+    blender.accumulate_harmonograph(harmonograph, size - 1)
+    return blender.get_image()
@@ -0,0 +1,82 @@
+"""Benchmark of the recurrence coordinate kernels against the exact one.
+
+Evaluates and renders every case with every Harmonograph kernel and compares the results with the exact kernel:
+
+    python -m harmonograph_mvc.benchmarks.recurrence_kernel --size 1000 --samples 1000000 4000000
+
+Coordinate error is the largest distance in pixels from the exact coordinates, and floored points the fraction of
+samples landing on a different pixel. Image differences are the largest and the mean absolute intensity difference
+and the fraction of pixels differing by more than one alpha step. The exit status is non-zero if any coordinate
+error exceeds --max-error pixels, so the run doubles as an accuracy check.
+"""
+import argparse
+import json
+import sys
+
+import numpy as np
+
+from harmonograph_mvc.benchmarks.common import CASES, MIN_ALPHA, STEPS, best_time, render
+from harmonograph_mvc.models.harmonograph import KERNELS, Harmonograph, HarmonographParams
+
+CASE_NAMES = ('lissajous', 'fast')
+
+
+def run_case(pendulums, samples: int, size: int, repeat: int) -> dict:
+    params = HarmonographParams(pendulums, 0, 2000, samples)
+    results = {}
+    for kernel in KERNELS:
+        harmonograph = Harmonograph(params, kernel)
+        coords, coords_seconds = best_time(lambda: harmonograph.get_coords(size - 1), repeat)
+        image, render_seconds = best_time(lambda: render(harmonograph, size), repeat)
+        results[kernel] = {'coords': coords, 'image': image, 'coords_seconds': coords_seconds,
+                           'render_seconds': render_seconds}
+
+    exact_coords, exact_image = results['exact']['coords'], results['exact']['image']
+    for result in results.values():
+        coords, image = result.pop('coords'), result.pop('image')
+        delta = np.abs(image.astype(np.int16) - exact_image)
+        result.update({
+            'samples_per_second': samples / result['coords_seconds'],
+            'max_error': float(np.abs(coords - exact_coords).max()),
+            'floored_points': float((np.floor(coords) != np.floor(exact_coords)).any(axis=0).mean()),
+            'max_difference': int(delta.max()),
+            'mean_difference': float(delta.mean()),
+            'pixels': float((delta > (255 - MIN_ALPHA) / STEPS).mean()),
+        })
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--size', type=int, default=1000, help="image width and height in pixels")
+    parser.add_argument('--samples', type=int, nargs='+', default=[1000000, 4000000])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--max-error', type=float, default=0.01, help="largest tolerated coordinate error in pixels")
+    parser.add_argument('--json', help="file to write the results to")
+    args = parser.parse_args(argv)
+
+    results = {}
+    failed = False
+    print(f"{'case':>10} {'samples':>8} {'kernel':>13} {'coords s':>9} {'samples/s':>10} {'render s':>9} "
+          f"{'max err px':>11} {'floored':>8} {'max diff':>8} {'pixels off':>10}")
+    for name in CASE_NAMES:
+        for samples in args.samples:
+            case = run_case(CASES[name], samples, args.size, args.repeat)
+            results[f'{name} {samples}'] = case
+            for kernel, result in case.items():
+                failed |= result['max_error'] > args.max_error
+                print(f"{name:>10} {samples:>8} {kernel:>13} {result['coords_seconds']:>9.3f} "
+                      f"{result['samples_per_second']:>10.3g} {result['render_seconds']:>9.3f} "
+                      f"{result['max_error']:>11.2e} {result['floored_points']:>8.3%} {result['max_difference']:>8} "
+                      f"{result['pixels']:>10.3%}")
+
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump(results, file, indent=2)
+    if failed:
+        print(f"coordinate error above {args.max_error} pixels")
+    return int(failed)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,44 @@
+"""Benchmark of the line and density render modes.
+
+Times a full render, from evaluation to intensities, in every render mode across sample counts:
+
+    python -m harmonograph_mvc.benchmarks.render_modes --size 1000 --samples 10000 100000 1000000
+
+Each timing is the best of --repeat runs. With --json the results are also written to a file.
+"""
+import argparse
+import json
+
+from harmonograph_mvc.benchmarks.common import CASES, best_time, render
+from harmonograph_mvc.models.harmonograph import Harmonograph, HarmonographParams
+from harmonograph_mvc.models.renderer import RENDER_MODES
+
+
+def time_render(mode: str, samples: int, size: int, repeat: int) -> float:
+    """Returns the best time in seconds of rendering the benchmark harmonograph in the given mode."""
+    harmonograph = Harmonograph(HarmonographParams(CASES['lissajous'], 0, 2000, samples))
+    return best_time(lambda: render(harmonograph, size, mode), repeat)[1]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--size', type=int, default=1000, help="image width and height in pixels")
+    parser.add_argument('--samples', type=int, nargs='+', default=[10000, 100000, 1000000, 4000000])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--json', help="file to write the results to")
+    args = parser.parse_args(argv)
+
+    results = []
+    print(f"{'samples':>10}" + ''.join(f"{mode:>12}" for mode in RENDER_MODES))
+    for samples in args.samples:
+        timings = {mode: time_render(mode, samples, args.size, args.repeat) for mode in RENDER_MODES}
+        results.append({'samples': samples, 'size': args.size, 'seconds': timings})
+        print(f"{samples:>10}" + ''.join(f"{timings[mode]:>11.3f}s" for mode in RENDER_MODES))
+
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
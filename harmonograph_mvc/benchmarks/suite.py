@@ -0,0 +1,200 @@
+"""Benchmark suite of coordinate generation and rasterization with regression checks.
+
+Times Harmonograph.get_coords, Harmonograph.get_pendulum_coords, ImageBlender.blend and a whole
+ApplicationController.generate_image across a matrix of sample counts, image sizes and pendulum counts, and stores
+the results as a JSON baseline:
+
+    python -m harmonograph_mvc.benchmarks.suite run -o baseline.json --samples 100000 1000000 --sizes 500 1000
+
+Later runs are compared against a baseline, and any benchmark whose throughput fell or whose peak memory grew by more
+than the thresholds is reported as a regression, with a non-zero exit status:
+
+    python -m harmonograph_mvc.benchmarks.suite run -o current.json --compare baseline.json
+    python -m harmonograph_mvc.benchmarks.suite compare baseline.json current.json --threshold 0.1
+
+Throughput is time samples per second of the best of --repeat runs. Peak memory is measured in a separate run traced
+by tracemalloc, which also records the stages of that run as reported by the profiler. Nothing here needs Qt.
+"""
+import argparse
+import json
+import platform
+import sys
+
+import numpy as np
+
+from harmonograph_mvc.benchmarks.common import MIN_ALPHA, STEPS, best_time
+from harmonograph_mvc.controllers.application_controller import ApplicationController
+from harmonograph_mvc.models.harmonograph import Harmonograph, HarmonographParams
+from harmonograph_mvc.models.renderer import ImageBlender
+from harmonograph_mvc.utils.profiler import Profiler, profiling, span
+
+# The image generated by the controller is this much larger than the harmonograph, see generate_image
+CONTROLLER_MARGIN = 50
+
+
+def benchmark_pendulums(pendulums: int) -> np.ndarray:
+    """Returns fixed (pendulums, 2, 4) parameters with near-rational frequency ratios, so that the curve fills the
+    image the same way in every run."""
+    rng = np.random.default_rng(pendulums)
+    params = np.empty((pendulums, 2, 4))
+    params[..., 0] = 1 / pendulums
+    params[..., 1] = rng.uniform(0.0003, 0.001, (pendulums, 2))
+    params[..., 2] = rng.integers(1, 4, (pendulums, 2)) + rng.uniform(-0.01, 0.01, (pendulums, 2))
+    params[..., 3] = rng.uniform(0, np.pi, (pendulums, 2))
+    return params
+
+
+def bench_get_coords(params: HarmonographParams, size: int):
+    return lambda: Harmonograph(params).get_coords(size - 1)
+
+
+def bench_get_pendulum_coords(params: HarmonographParams, size: int):
+    return lambda: Harmonograph(params).get_pendulum_coords(size - 1)
+
+
+def bench_blend(params: HarmonographParams, size: int):
+    # Only the rasterization is timed, of coordinates evaluated beforehand
+    x, y = Harmonograph(params).get_coords(size - 1)
+    return lambda: ImageBlender(size, size, MIN_ALPHA, STEPS).blend(x, y)
+
+
+def bench_generate_image(params: HarmonographParams, size: int):
+    def generate():
+        # A fresh controller per run, so that the render cache never answers
+        controller = ApplicationController(MIN_ALPHA, STEPS, pendulums=len(params.pendulums))
+        controller.params = params
+        controller.generate_image(size + CONTROLLER_MARGIN, size + CONTROLLER_MARGIN, False, MIN_ALPHA, STEPS)
+    return generate
+
+
+BENCHMARKS = {
+    'get_coords': bench_get_coords,
+    'get_pendulum_coords': bench_get_pendulum_coords,
+    'blend': bench_blend,
+    'generate_image': bench_generate_image,
+}
+
+
+def run_benchmark(name: str, samples: int, size: int, pendulums: int, repeat: int) -> dict:
+    """Runs one benchmark of the matrix and returns its result."""
+    params = HarmonographParams(benchmark_pendulums(pendulums), 0, 2000, samples)
+    run = BENCHMARKS[name](params, size)
+
+    _, best = best_time(run, repeat)
+
+    profiler = Profiler(trace_memory=True)
+    with profiling(profiler), span(name) as root:
+        run()
+
+    return {
+        'benchmark': name, 'samples': samples, 'size': size, 'pendulums': pendulums,
+        'seconds': best, 'throughput': samples / best, 'peak_bytes': root.peak_bytes,
+        'stages': {stage: totals for stage, totals in profiler.stages().items() if stage != name},
+    }
+
+
+def result_key(result: dict) -> tuple:
+    return result['benchmark'], result['samples'], result['size'], result['pendulums']
+
+
+def environment() -> dict:
+    return {'python': sys.version.split()[0], 'numpy': np.__version__, 'platform': platform.platform(),
+            'processor': platform.processor() or platform.machine()}
+
+
+def run_suite(benchmarks, samples, sizes, pendulums, repeat: int) -> dict:
+    results = []
+    print(f"{'benchmark':>20} {'samples':>9} {'size':>5} {'pendulums':>9} {'seconds':>8} {'samples/s':>11} "
+          f"{'peak MB':>8}")
+    for name in benchmarks:
+        for pendulum_count in pendulums:
+            for size in sizes:
+                for sample_count in samples:
+                    result = run_benchmark(name, sample_count, size, pendulum_count, repeat)
+                    results.append(result)
+                    print(f"{name:>20} {sample_count:>9} {size:>5} {pendulum_count:>9} {result['seconds']:>8.3f} "
+                          f"{result['throughput']:>11.3g} {result['peak_bytes'] / 2 ** 20:>8.1f}")
+    return {'environment': environment(), 'repeat': repeat, 'results': results}
+
+
+def compare(baseline: dict, current: dict, threshold: float, memory_threshold: float) -> list:
+    """Prints the change of every benchmark present in both runs and returns those that regressed.
+
+    A benchmark regresses if its throughput fell by more than the threshold, or its peak memory grew by more than the
+    memory threshold, both as fractions of the baseline.
+    """
+    baseline_results = {result_key(result): result for result in baseline['results']}
+    if baseline.get('environment') != current.get('environment'):
+        print("warning: the runs were made in different environments, differences may not be regressions")
+
+    regressions = []
+    print(f"{'benchmark':>20} {'samples':>9} {'size':>5} {'pendulums':>9} {'throughput':>11} {'peak memory':>12}")
+    for result in current['results']:
+        base = baseline_results.get(result_key(result))
+        if base is None:
+            continue
+        throughput_change = result['throughput'] / base['throughput'] - 1
+        memory_change = result['peak_bytes'] / max(base['peak_bytes'], 1) - 1
+        regressed = throughput_change < -threshold or memory_change > memory_threshold
+        if regressed:
+            regressions.append(result)
+        name, samples, size, pendulums = result_key(result)
+        print(f"{name:>20} {samples:>9} {size:>5} {pendulums:>9} {throughput_change:>+11.1%} {memory_change:>+12.1%}"
+              + ("  REGRESSION" if regressed else ""))
+
+    missing = baseline_results.keys() - {result_key(result) for result in current['results']}
+    if missing:
+        print(f"{len(missing)} baseline benchmarks were not run")
+    return regressions
+
+
+def load(path: str) -> dict:
+    with open(path) as file:
+        return json.load(file)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help="run the benchmark matrix")
+    run_parser.add_argument('--benchmarks', nargs='+', choices=list(BENCHMARKS), default=list(BENCHMARKS))
+    run_parser.add_argument('--samples', type=int, nargs='+', default=[100000, 1000000])
+    run_parser.add_argument('--sizes', type=int, nargs='+', default=[500, 1000], help="image sizes in pixels")
+    run_parser.add_argument('--pendulums', type=int, nargs='+', default=[2, 4])
+    run_parser.add_argument('--repeat', type=int, default=3)
+    run_parser.add_argument('-o', '--output', help="file to write the results to, for use as a baseline")
+    run_parser.add_argument('--compare', metavar='BASELINE', help="baseline to compare the results with")
+
+    compare_parser = commands.add_parser('compare', help="compare results with a baseline")
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+
+    for command_parser in (run_parser, compare_parser):
+        command_parser.add_argument('--threshold', type=float, default=0.1,
+                                    help="fraction by which throughput may fall before it counts as a regression")
+        command_parser.add_argument('--memory-threshold', type=float, default=0.1,
+                                    help="fraction by which peak memory may grow before it counts as a regression")
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        current = run_suite(args.benchmarks, args.samples, args.sizes, args.pendulums, args.repeat)
+        if args.output:
+            with open(args.output, 'w') as file:
+                json.dump(current, file, indent=2)
+        if not args.compare:
+            return 0
+        baseline = load(args.compare)
+    else:
+        baseline, current = load(args.baseline), load(args.current)
+
+    regressions = compare(baseline, current, args.threshold, args.memory_threshold)
+    if regressions:
+        print(f"{len(regressions)} regressions beyond {args.threshold:.0%} throughput or {args.memory_threshold:.0%} "
+              f"peak memory")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
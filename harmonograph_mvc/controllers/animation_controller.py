@@ -0,0 +1,81 @@
+import numpy as np
+
+from harmonograph_mvc.models.harmonograph import Harmonograph, HarmonographParams
+from harmonograph_mvc.models.rasterizer import alpha_lut, hits_to_intensities
+from harmonograph_mvc.models.renderer import ImageBlender
+
+
+class AnimationController:
+    """Plays the pen tracing the harmonograph in real time.
+
+    Every frame evaluates and rasterizes only the time samples reached since the previous frame into a persistent
+    hit buffer and remaps only the region those segments cover into the persistent intensity buffer. The caller
+    drives it with advance() from a timer and repaints the returned dirty region. Progress follows the wall clock,
+    so a frame that runs over budget makes the following frames catch up, and the frames in between are skipped.
+    """
+    def __init__(self, params: HarmonographParams, width: int, height: int, min_alpha: int = 25, steps: int = 10,
+                 duration: float = 10.0, fps: float = 30.0):
+        if not 0 < duration < float('inf'):
+            raise ValueError(f"Animation duration must be positive and finite, got {duration}")
+        self.harmonograph = Harmonograph(params)
+        self.blender = ImageBlender(width, height, min_alpha, steps)
+        self.size = min(width, height) - 1
+        self.bounds = self.harmonograph.normalization_bounds(self.size)
+        # A pixel is hit at most once per segment, which bounds the table without knowing the final counts
+        self.lut = alpha_lut(min_alpha, self.blender.alpha_increment, self.harmonograph.t_samples)
+        self.intensities = np.zeros((width, height), dtype=np.uint8)
+
+        self.samples_per_second = self.harmonograph.t_samples / duration
+        self.frame_interval = 1 / fps
+        self.position = 0  # Index of the last sample drawn up to
+        self.start_time = None
+        self.frame = 0
+        self.skipped_frames = 0
+        self.last_frame_time = None
+        self.fps = 0.0
+
+    @property
+    def done(self) -> bool:
+        return self.position >= self.harmonograph.t_samples - 1
+
+    @property
+    def fraction(self) -> float:
+        return self.position / max(self.harmonograph.t_samples - 1, 1)
+
+    def start(self, now: float):
+        """Starts the animation clock at the given time in seconds."""
+        self.start_time = now
+        self.last_frame_time = now
+
+    def advance(self, now: float):
+        """Draws the segments reached by the given time in seconds.
+
+        Returns the dirty (row_start, row_stop, column_start, column_stop) region of the intensity buffer, or None if
+        no frame is due or nothing was drawn.
+        """
+        elapsed = now - self.start_time
+        due_frame = int(elapsed / self.frame_interval)
+        if due_frame <= self.frame or self.done:
+            return None
+
+        # Frames the timer could not deliver in time are dropped rather than queued
+        self.skipped_frames += due_frame - self.frame - 1
+        self.frame = due_frame
+        frame_seconds = now - self.last_frame_time
+        self.fps = 1 / frame_seconds if not self.fps else 0.9 * self.fps + 0.1 / frame_seconds
+        self.last_frame_time = now
+
+        target = min(int(elapsed * self.samples_per_second), self.harmonograph.t_samples - 1)
+        if target <= self.position:
+            return None
+
+        _, coords = self.harmonograph.evaluate_at(np.arange(self.position, target + 1), self.size, self.bounds)
+        self.blender.accumulate(coords[0], coords[1])
+        self.position = target
+
+        # Every pixel of a segment lies within the bounding box of its end points
+        x, y = coords[0].astype(np.int64), coords[1].astype(np.int64)
+        region = (x.min(), x.max() + 1, y.min(), y.max() + 1)
+        rows, columns = slice(*region[:2]), slice(*region[2:])
+        self.intensities[rows, columns] = hits_to_intensities(self.blender.hits[0][rows, columns], self.lut)
+        return region
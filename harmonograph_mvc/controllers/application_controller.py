@@ -1,23 +1,49 @@
+import time
+
+import numpy as np
+
 from harmonograph_mvc.models.harmonograph import Harmonograph, HarmonographParams
 from harmonograph_mvc.models.renderer import ImageBlender
-from harmonograph_mvc.utils.timing import timed
+from harmonograph_mvc.models.sweep_renderer import render_contact_sheet, sweep_params
+from harmonograph_mvc.models.tile_renderer import TileRenderer
+from harmonograph_mvc.utils.expressions import Expression, ExpressionError
+from harmonograph_mvc.utils.profiler import count, span
+from harmonograph_mvc.utils.render_cache import RenderCache
+from harmonograph_mvc.utils.timing import timed_passthrough
+
+# Time points at which expression fields are checked for values that are not finite
+EXPRESSION_CHECK_SAMPLES = 4096
+
+
+def progress_range(progress, start: float, stop: float):
+    """Returns a progress callback mapping the fractions of one stage to [start, stop] of progress, or None."""
+    if progress is None:
+        return None
+    return lambda fraction: progress(start + fraction * (stop - start))
 
 
 class ApplicationController:
-    def __init__(self, min_alpha: int = 0, steps: int = 10):
+    def __init__(self, min_alpha: int = 0, steps: int = 10, pendulums: int = 2, dim: int = 2, render_store=None):
+        """Renders are kept in an in-memory RenderCache and, if a RenderStore is given, on disk across sessions."""
         self.min_alpha = min_alpha
         self.steps = steps
         self.images = {}
+        self.first_image_time = None
         self.invalid_param_widgets = []
         self.params = None
         self.harmonograph = None
         self.blender = None
         self.start_time = None
         self.display_mode = 0
-        self.dim = 2
-        self.pendulums = 2
+        self.dim = dim
+        self.pendulums = pendulums
+        self.render_cache = RenderCache()
+        self.render_store = render_store
 
     def get_param_values(self, param_widgets, t_param_widgets):
+        """Reads the pendulum and time parameters from their widgets. Pendulum parameters may be expressions in t,
+        which are returned by (pendulum, axis, parameter) cell and hold their value at t_start in the pendulum
+        array."""
         params = []
         t_params = []
         self.invalid_param_widgets = []
@@ -33,51 +59,172 @@ class ApplicationController:
         for input_widget in t_param_widgets:
             value = input_widget.get_value()
 
-            if value is None:
+            if value is None or isinstance(value, Expression):
                 self.invalid_param_widgets.append(input_widget)
             else:
                 t_params.append(value)
 
-        pendulum_params = []
-        for pendulum in range(self.pendulums):
-            pendulum_axes_params = []
-            for axis in range(self.dim):
-                axis_params = tuple(params[i] for i in range(pendulum + axis * self.pendulums, len(params),
-                                                             self.dim * self.pendulums))
-                pendulum_axes_params.append(axis_params)
-            pendulum_params.append(tuple(pendulum_axes_params))
-        return pendulum_params, t_params
+        # Expressions in t are sampled over the time range, so that fields that are not finite somewhere in it are
+        # flagged here rather than failing the generation
+        if not self.invalid_param_widgets:
+            check_times = np.linspace(t_params[0], t_params[1], EXPRESSION_CHECK_SAMPLES)
+            for input_widget, value in zip(param_widgets, params):
+                if isinstance(value, Expression) and value.time_varying:
+                    try:
+                        value(check_times)
+                    except ExpressionError:
+                        self.invalid_param_widgets.append(input_widget)
+
+        if self.invalid_param_widgets:
+            return None, t_params, {}
+
+        # The widgets hold one row per parameter and one column per axis and pendulum, pendulums varying fastest
+        cells = np.indices((4, self.dim, self.pendulums)).reshape(3, -1).T[:, ::-1]
+        expressions = {tuple(cell.tolist()): value for cell, value in zip(cells, params)
+                       if isinstance(value, Expression)}
+        params = [value(np.array([t_params[0]]))[0] if isinstance(value, Expression) else value for value in params]
+        pendulum_params = np.array(params).reshape(4, self.dim, self.pendulums).transpose(2, 1, 0)
+        return pendulum_params, t_params, expressions
 
     def set_harmonograph_params(self, param_values):
-        print("PARAMS:", param_values[0], *param_values[1])
-        self.params = HarmonographParams(param_values[0], *param_values[1])
+        print("PARAMS:", param_values[0].tolist(), *param_values[1],
+              *(f"{cell}: {expression.text}" for cell, expression in param_values[2].items()))
+        self.params = HarmonographParams(param_values[0], *param_values[1], expressions=param_values[2])
 
     def switch_display_mode(self):
         self.display_mode = (self.display_mode + 1) % 4
 
-    @timed
-    def generate_image(self, width, height, show_pendulum_paths, min_alpha, alpha_steps):
-        self.blender = ImageBlender(width - 50, height - 50, min_alpha, alpha_steps)
-        self.harmonograph = Harmonograph(self.params)
-        self.blender.reset()
-
-        if show_pendulum_paths:
-            pendulum_coords = self.harmonograph.get_pendulum_coords(min(self.blender.width, self.blender.height) - 1)
-
-            self.images = {}
-            self.images['full'] = self.blender.blend(
-                *self.harmonograph.get_coords(min(self.blender.width, self.blender.height) - 1))
-
-            for i, coords in enumerate(pendulum_coords, start=1):
-                self.blender.reset()
-                image = self.blender.blend(*coords)
-                self.images[f'pendulum_{i}'] = image
-
+    @timed_passthrough
+    def generate_image(self, width, height, show_pendulum_paths, min_alpha, alpha_steps, workers=1, progressive=False,
+                       layer_colors=None, render_mode='lines', adaptive=False, kernel='exact', progress=None,
+                       preview=None):
+        """Generates the harmonograph images and returns them by name.
+
+        If layer_colors is given, every pendulum path is rendered along with the harmonograph and all of them are also
+        blended into a 'composite' RGB image, the harmonograph in the first color and pendulum i in color i + 1,
+        repeating the colors if there are fewer than layers. render_mode is one of the ImageBlender RENDER_MODES.
+        Adaptive sampling places up to t_samples samples about a pixel apart along the curve instead of evenly in time.
+        kernel is one of the Harmonograph KERNELS.
+
+        If given, progress is called with the completed fraction of the whole generation; it may raise to abort. In
+        progressive mode the curve is drawn in refining passes and preview is called with the partial images after
+        every pass but the last. The time until the first image was available is kept in first_image_time. Stages
+        are recorded as spans of the active profiler, if any.
+        """
+        start_time = time.perf_counter()
+        first_image_time = None
+        # A superseded generation may still be running in another worker, so the job's state stays local until it
+        # has completed and is published at the end
+        params = self.params
+        layers = self.pendulums + 1 if show_pendulum_paths or layer_colors else 1
+        if layer_colors:
+            layer_colors = [layer_colors[i % len(layer_colors)] for i in range(layers)]
+        blender = ImageBlender(width - 50, height - 50, min_alpha, alpha_steps, workers, layers, render_mode)
+        harmonograph = Harmonograph(params, kernel)
+        size = min(blender.width, blender.height) - 1
+
+        # The adaptive times are also needed on a cache hit, so that tiles zoom into the sampling that is on screen
+        if adaptive:
+            with span('adaptive sampling', samples=params.t_samples):
+                times = harmonograph.arc_length_times(size)
+            harmonograph = Harmonograph(HarmonographParams(params.pendulums, params.t_start, params.t_end,
+                                                           params.t_samples, times, params.expressions), kernel)
+
+        # Alpha settings only affect the mapping of hit counts to intensities, so cached counts are reused as they are
+        key = self.render_key(blender.width, blender.height, render_mode, adaptive, kernel, params)
+        with span('cache lookup'):
+            hits = self.render_cache.get(key, layers)
+            count(cache_hits=int(hits is not None))
+            if hits is None and self.render_store is not None:
+                hits = self.render_store.get(key, layers)
+                count(store_hits=int(hits is not None))
+                if hits is not None:
+                    self.render_cache.put(key, hits)
+        if hits is not None:
+            blender.hits = hits
         else:
-            x, y = self.harmonograph.get_coords(min(self.blender.width, self.blender.height) - 1)
-            image = self.blender.blend(x, y)
+            # The bounds are computed here rather than by the blender, so that their passes over the curve are
+            # reported and can be cancelled too. Progress is shared between them and the render by the samples they
+            # evaluate
+            evaluated = 2 * harmonograph.bounds_samples()
+            normalization_share = evaluated / (evaluated + harmonograph.t_samples)
+            bounds = harmonograph.normalization_bounds(size, progress=progress_range(progress, 0, normalization_share))
+            render_progress = progress_range(progress, normalization_share, 1)
+            if progressive:
+                # Partial passes are previewed, and the completed hit counts equal those of a full render
+                for fraction in blender.iter_progressive(harmonograph, size, bounds=bounds):
+                    if render_progress is not None:
+                        render_progress(fraction)
+                    if fraction < 1:
+                        if first_image_time is None:
+                            first_image_time = time.perf_counter() - start_time
+                        if preview is not None:
+                            preview(self.get_layer_images(blender, layers, layer_colors))
+            else:
+                # The harmonograph and the pendulum paths come from the same streamed evaluation, one layer each
+                blender.accumulate_harmonograph(harmonograph, size, bounds, progress=render_progress)
+            # An abandoned generation raises here, so that hit counts are only stored for completed ones
+            if progress is not None:
+                progress(1)
+            self.store_render(key, blender.hits)
+
+        images = self.get_layer_images(blender, layers, layer_colors)
+        if first_image_time is None:
+            first_image_time = time.perf_counter() - start_time
+
+        if progress is not None:
+            progress(1)
+        self.blender, self.harmonograph = blender, harmonograph
+        self.min_alpha, self.steps = min_alpha, alpha_steps
+        self.first_image_time = first_image_time
+        self.images = images
+        return images
+
+    @timed_passthrough
+    def generate_sweep(self, cell, start, stop, count, thumb_size, min_alpha, alpha_steps, progress=None,
+                       preview=None):
+        """Generates a contact sheet of the current parameters with the (pendulum, axis, parameter) cell swept over
+        count values from start to stop, and returns it as the 'full' image."""
+        start_time = time.perf_counter()
+        params = sweep_params(self.params, cell, np.linspace(start, stop, count))
+        sheet, _ = render_contact_sheet(params, thumb_size, min_alpha=min_alpha, steps=alpha_steps, progress=progress)
+        self.blender = None
+        self.first_image_time = time.perf_counter() - start_time
+        self.images = {'full': sheet}
+        return self.images
 
-            self.images = {'full': image}
+    def get_tile_renderer(self):
+        """Returns a TileRenderer for zooming into the last generated harmonograph, or None if the last generation
+        was not drawn with lines."""
+        if self.blender is None or self.blender.mode != 'lines':
+            return None
+        return TileRenderer(self.harmonograph, self.blender.width, self.blender.height, self.min_alpha, self.steps)
+
+    @staticmethod
+    def get_layer_images(blender, layers, layer_colors=None):
+        """Converts the blender's hit count layers to images by name, and blends them into a 'composite' image if
+        layer colors are given."""
+        images = {'full': blender.get_image()}
+        for i in range(1, layers):
+            images[f'pendulum_{i}'] = blender.get_image(i)
+        if layer_colors:
+            images['composite'] = blender.get_composite(layer_colors)
+        return images
+
+    def store_render(self, key, hit_counts):
+        """Keeps rendered hit counts in the render cache and, if there is one, the render store."""
+        self.render_cache.put(key, hit_counts)
+        if self.render_store is not None:
+            with span('store write', bytes=hit_counts.nbytes):
+                self.render_store.put(key, hit_counts)
+
+    def render_key(self, width, height, render_mode='lines', adaptive=False, kernel='exact', params=None):
+        """Returns the cache key of the given or the current parameters at the given output size, render mode,
+        sampling and kernel. Time-varying parameters are keyed by their expression text."""
+        params = params or self.params
+        expressions = tuple((cell, expression.text) for cell, expression in sorted(params.expressions.items()))
+        return (tuple(params.pendulums.ravel().tolist()), params.pendulums.shape, expressions, params.t_start,
+                params.t_end, params.t_samples, width, height, render_mode, adaptive, kernel)
 
     def get_images(self):
         return self.images
@@ -0,0 +1,96 @@
+import time
+
+from harmonograph_mvc.models.harmonograph import Harmonograph, HarmonographParams
+from harmonograph_mvc.models.renderer import ImageBlender
+
+SCALES = (1.0, 0.5, 0.25)
+PROBE_SAMPLES = 5000
+MIN_PREVIEW_SAMPLES = 20000
+# Fraction of the sample count below which the bounds of the count are close enough to stop refining
+SETTLED = 0.02
+
+
+class LiveController:
+    """Renders quick previews of parameter edits within a frame budget.
+
+    The cost of a render is modelled as one work unit per time sample evaluated plus one per pixel its segment draws.
+    Pixels per sample are measured by every preview and scaled to full resolution, so that fast or dense curves, whose
+    segments span many pixels, get proportionally fewer samples. The throughput in work units per second is kept as
+    an exponential moving average, and each preview picks the largest resolution and sample count predicted to fit
+    the budget.
+
+    Pixels per sample change with the sample count, erratically so for curves that alias, so the predicted count is
+    also kept between the last count that fit the budget and the last that did not at the same resolution. Without
+    that, such curves alternate between a too small and a too large preview. The bounds are dropped once a preview
+    runs far under budget or a count that fit no longer does, as happens when the parameters change.
+    """
+    def __init__(self, frame_budget: float = 0.033, smoothing: float = 0.3):
+        self.frame_budget = frame_budget
+        self.smoothing = smoothing
+        self.throughput = None  # Work units per second
+        self.pixels_per_sample = None  # Pixels drawn per segment at full resolution
+        self.scale = None  # Resolution scale of the last preview, which the bounds below apply to
+        self.fitted_samples = None  # Largest sample count known to fit the budget
+        self.missed_samples = None  # Smallest sample count known to exceed the budget
+
+    def plan(self, t_samples: int):
+        """Returns the sample count and resolution scale of the next preview."""
+        if self.throughput is None:
+            # Nothing measured yet, so a small render measures it
+            return min(t_samples, PROBE_SAMPLES), SCALES[-1]
+
+        budget = self.throughput * self.frame_budget
+        for scale in SCALES:
+            samples = int(budget / (1 + scale * self.pixels_per_sample))
+            if samples >= min(t_samples, MIN_PREVIEW_SAMPLES):
+                break
+        else:
+            # Even the smallest resolution cannot take a full preview
+            samples = max(samples, PROBE_SAMPLES)
+
+        if scale == self.scale:
+            if self.missed_samples is not None and samples >= self.missed_samples:
+                # Bisect between the bounds, and settle on the count that fit once they are close
+                fitted = self.fitted_samples or self.missed_samples // 2
+                samples = fitted if self.missed_samples - fitted <= self.missed_samples * SETTLED else \
+                    (fitted + self.missed_samples) // 2
+            if self.fitted_samples is not None:
+                samples = max(samples, self.fitted_samples)
+        return min(t_samples, samples), scale
+
+    def record(self, samples: int, scale: float, elapsed: float):
+        """Tightens or drops the bounds of the sample count after a preview that took elapsed seconds."""
+        if scale != self.scale:
+            self.scale, self.fitted_samples, self.missed_samples = scale, None, None
+        if elapsed <= self.frame_budget:
+            self.fitted_samples = max(samples, self.fitted_samples or 0)
+            if elapsed < self.frame_budget / 2 or (self.missed_samples is not None and samples >= self.missed_samples):
+                self.missed_samples = None
+        else:
+            self.missed_samples = min(samples, self.missed_samples or samples)
+            if self.fitted_samples is not None and samples <= self.fitted_samples:
+                self.fitted_samples = None
+
+    def render_preview(self, params: HarmonographParams, width: int, height: int, min_alpha: int, steps: int,
+                       kernel: str = 'exact'):
+        """Renders a preview of the parameters for a width x height image with the given Harmonograph kernel.
+
+        Returns the intensities, which are smaller than width x height at a reduced scale, and the scale.
+        """
+        samples, scale = self.plan(params.t_samples)
+        start = time.perf_counter()
+
+        blender = ImageBlender(max(2, int(width * scale)), max(2, int(height * scale)), min_alpha, steps)
+        preview_params = HarmonographParams(params.pendulums, params.t_start, params.t_end, samples,
+                                            expressions=params.expressions)
+        blender.accumulate_harmonograph(Harmonograph(preview_params, kernel), min(blender.width, blender.height) - 1)
+        intensities = blender.get_image()
+
+        elapsed = time.perf_counter() - start
+        drawn = int(blender.hits[0].sum(dtype='int64'))
+        rate = (samples + drawn) / elapsed
+        previous = self.throughput
+        self.throughput = rate if previous is None else previous + self.smoothing * (rate - previous)
+        self.pixels_per_sample = drawn / (scale * max(samples - 1, 1))
+        self.record(samples, scale, elapsed)
+        return intensities, scale
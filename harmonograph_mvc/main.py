@@ -17,11 +17,13 @@ def print_memory_usage():
     print("Memory usage:", process.memory_info().rss * 0.000001)
 
 
-sys.excepthook = excepthook
-
-app = QApplication([])
-window = ApplicationView()
-window.show()
-print_memory_usage()
-app.exec_()
-print_memory_usage()
+# Guarded so that spawned render worker processes do not start the GUI again
+if __name__ == '__main__':
+    sys.excepthook = excepthook
+
+    app = QApplication([])
+    window = ApplicationView()
+    window.show()
+    print_memory_usage()
+    app.exec_()
+    print_memory_usage()
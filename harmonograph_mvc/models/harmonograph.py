@@ -1,59 +1,295 @@
 import numpy as np
 
+from harmonograph_mvc.utils.profiler import span
+
+# Number of time samples evaluated at once when streaming coordinates
+CHUNK_SIZE = 1 << 17
+# Resolution of the grid the arc length is integrated on, in samples per period of the fastest pendulum
+ARC_GRID_SAMPLES_PER_PERIOD = 32
+# Samples per period of the fastest pendulum that the normalization bounds are estimated from. A sinusoid sampled this
+# finely misses its extremes by at most 1 - cos(pi / 64), about 0.1% of its amplitude
+BOUNDS_SAMPLES_PER_PERIOD = 64
+# Coordinate kernels, see Harmonograph, with the float type the recurrence kernels compute in
+KERNELS = ('exact', 'recurrence', 'recurrence32')
+RECURRENCE_DTYPES = {'recurrence': np.float64, 'recurrence32': np.float32}
+# Samples the recurrence kernels advance from every exactly computed block start
+RECURRENCE_BLOCK = 256
+
+
 class HarmonographParams:
-    """A class for managing Harmonograph parameters."""
-    def __init__(self, pendulums, t_start, t_end, t_samples):
-        self.pendulums = pendulums
-        self.t_start = int(t_start)
-        self.t_end = int(t_end)
-        self.t_samples = int(t_samples)
+    """A class for managing Harmonograph parameters.
+
+    Pendulum parameters are stored as a single (pendulums, dims, 4) array holding the amplitude, dampening, frequency
+    and phase of every pendulum along every axis. The time points default to t_samples evenly spaced from t_start to
+    t_end, unless an explicit increasing array of times is given, which then sets t_samples.
+
+    Time-varying parameters are given as expressions, a dict mapping (pendulum, axis, parameter) cells of the pendulum
+    array to compiled Expressions in t that replace the cell's value at every time point.
+    """
+    def __init__(self, pendulums, t_start, t_end, t_samples, times=None, expressions=None):
+        self.pendulums = np.asarray(pendulums, dtype=np.float64)
+        self.t_start = float(t_start)
+        self.t_end = float(t_end)
+        self.times = None if times is None else np.asarray(times, dtype=np.float64)
+        self.t_samples = int(t_samples) if times is None else len(self.times)
+        self.expressions = dict(expressions or {})
 
     def to_dict(self):
         """Converts the parameters to a dictionary."""
         return {
-            **{f"pendulum_{i+1}": pendulum for i, pendulum in enumerate(self.pendulums)},
+            "pendulums": self.pendulums,
             "t_start": self.t_start,
             "t_end": self.t_end,
-            "t_samples": self.t_samples
+            "t_samples": self.t_samples,
+            "times": self.times,
+            "expressions": self.expressions
         }
 
 
 class Harmonograph:
-    """A parametric representation of a multi-pendulum harmonograph expressed with an arbitrary number of dimensions"""
-    def __init__(self, init_conditions: HarmonographParams):
+    """A parametric representation of a multi-pendulum harmonograph expressed with an arbitrary number of dimensions
+
+    The pendulum parameters may carry leading batch axes, e.g. (sets, pendulums, dims, 4) for a parameter sweep, in
+    which case every coordinate and bounds array carries the same leading axes and each set is normalized on its own.
+
+    The kernel decides how evenly spaced time points are evaluated. 'exact' calls sin and exp for every sample. The
+    recurrence kernels instead treat each oscillation as a decaying phasor, A e^(-d t) e^(i (f t + p)), which advances
+    by a fixed complex factor per time step: the phasor is computed exactly at the start of every block of
+    RECURRENCE_BLOCK samples and multiplied by the precomputed factors 1, w, w^2, ... of the block, so errors never
+    accumulate past a block. 'recurrence' computes in float64 and 'recurrence32' in float32. Explicit times and
+    time-varying parameters always use the exact kernel.
+    """
+    def __init__(self, init_conditions: HarmonographParams, kernel: str = 'exact'):
+        if kernel not in KERNELS:
+            raise ValueError(f"Unknown kernel '{kernel}', expected one of {', '.join(KERNELS)}")
         self.__dict__.update(init_conditions.to_dict())
-        self.t = np.linspace(self.t_start, self.t_end, self.t_samples)
-        self.dim = len(self.pendulum_1)  # now accessing the first pendulum attribute directly
+        self.kernel = kernel
+        self.batch_shape = self.pendulums.shape[:-3]
+        self.n_pendulums, self.dim = self.pendulums.shape[-3:-1]
+        if self.batch_shape and not self.expressions:
+            # Sets of a sweep mostly share their pendulums, so every distinct oscillation and decay is computed once
+            rows = self.pendulums.reshape(-1, 4)
+            self._waves, self._wave_index = np.unique(rows[:, [0, 2, 3]], axis=0, return_inverse=True)
+            self._decays, self._decay_index = np.unique(rows[:, 1], return_inverse=True)
+
+    @property
+    def t(self) -> np.ndarray:
+        """The full array of time points. Large sample counts should be streamed with iter_coords instead."""
+        return self.time_chunk(0, self.t_samples)
+
+    def time_chunk(self, start: int, stop: int) -> np.ndarray:
+        """Returns the time points [start, stop) of np.linspace(t_start, t_end, t_samples) without building the full
+        array."""
+        return self.time_at(np.arange(start, stop))
 
-    def _get_pendulums(self):
-        """Helper method to iterate over pendulums in the object"""
-        return (self.__dict__[key] for key in self.__dict__ if key.startswith('pendulum'))
+    def time_at(self, indices: np.ndarray) -> np.ndarray:
+        """Returns the time points at the given sample indices of np.linspace(t_start, t_end, t_samples), or of the
+        explicit times. Values are computed the way np.linspace does, so they match the full array exactly."""
+        if self.times is not None:
+            return self.times[indices]
+        if self.t_samples == 1:
+            return np.full(len(indices), float(self.t_start))
+        step = (self.t_end - self.t_start) / (self.t_samples - 1)
+        t = np.asarray(indices, dtype=np.float64) * step + self.t_start
+        t[indices == self.t_samples - 1] = self.t_end
+        return t
 
-    def _compute_coords(self, pendulum_params: list, size: int) -> list:
-        """Helper method to compute pendulum coordinates given its parameters"""
-        coords = [np.zeros(self.t_samples) for _ in range(self.dim)]
-        for axis, (A, d, f, p) in enumerate(pendulum_params):
-            coords[axis] = A * np.sin(self.t * f + p) * np.exp(-d * self.t)
-        return self._normalize(coords, size)
+    def _parameters(self, t: np.ndarray) -> np.ndarray:
+        """Helper method returning the (..., pendulums, dims, 4, 1) pendulum parameters, or (..., 4, samples) with the
+        time-varying parameters evaluated at the given time points"""
+        if not self.expressions:
+            return self.pendulums[..., None]
+        parameters = np.repeat(self.pendulums[..., None], len(t), axis=-1)
+        for cell, expression in self.expressions.items():
+            parameters[(..., *cell, slice(None))] = expression(t)
+        return parameters
+
+    def _raw_coords(self, t: np.ndarray) -> np.ndarray:
+        """Helper method to compute the unnormalized (..., pendulums, dims, samples) coordinates of every pendulum at
+        the given time points in a single broadcast pass"""
+        if self.batch_shape and not self.expressions:
+            A, f, p = (self._waves[:, i, None] for i in range(3))
+            waves = (A * np.sin(t * f + p))[self._wave_index.ravel()]
+            waves *= np.exp(-self._decays[:, None] * t)[self._decay_index.ravel()]
+            return waves.reshape(*self.pendulums.shape[:-1], len(t))
+        A, d, f, p = np.moveaxis(self._parameters(t), -2, 0)
+        return A * np.sin(t * f + p) * np.exp(-d * t)
+
+    def _recurrence_coords(self, start: int, stop: int) -> np.ndarray:
+        """Helper method to compute the unnormalized coordinates of the evenly spaced samples [start, stop) with the
+        recurrence kernel. Blocks start at multiples of RECURRENCE_BLOCK, so that a sample gets the same value whichever
+        range it is computed in."""
+        dtype = RECURRENCE_DTYPES[self.kernel]
+        first_block, last_block = start // RECURRENCE_BLOCK, -(-stop // RECURRENCE_BLOCK)
+        block_t = self.time_at(np.arange(first_block, last_block) * RECURRENCE_BLOCK)[:, None]
+        offsets = np.arange(RECURRENCE_BLOCK) * ((self.t_end - self.t_start) / (self.t_samples - 1))
+        A, d, f, p = (self.pendulums[..., i, None, None] for i in range(4))
+
+        # Im(z0 * w^k) for the phasor z0 at every block start and the factor w^k of every step k into the block
+        magnitude = A * np.exp(-d * block_t)
+        phase = f * block_t + p
+        start_sin, start_cos = (magnitude * np.sin(phase)).astype(dtype), (magnitude * np.cos(phase)).astype(dtype)
+        decay = np.exp(-d * offsets)
+        step_sin, step_cos = (decay * np.sin(f * offsets)).astype(dtype), (decay * np.cos(f * offsets)).astype(dtype)
+        coords = start_sin * step_cos
+        coords += start_cos * step_sin
+        # Coordinates are returned as float64 like those of the exact kernel, so normalization is the same
+        offset = start - first_block * RECURRENCE_BLOCK
+        return coords.reshape(*coords.shape[:-2], -1)[..., offset:offset + stop - start].astype(np.float64)
+
+    def _raw_range(self, start: int, stop: int) -> np.ndarray:
+        """Helper method to compute the unnormalized coordinates of the samples [start, stop) with the kernel"""
+        if self.kernel == 'exact' or self.times is not None or self.expressions or self.t_samples < 2:
+            with span('time array build', samples=stop - start):
+                t = self.time_chunk(start, stop)
+            return self._raw_coords(t)
+        return self._recurrence_coords(start, stop)
+
+    def _raw_velocity(self, t: np.ndarray) -> np.ndarray:
+        """Helper method to compute the time derivative of _raw_coords, A * e^(-d * t) * (f * cos(f * t + p) -
+        d * sin(f * t + p)), at the given time points. With time-varying parameters it is differentiated numerically
+        instead."""
+        if self.expressions:
+            return np.gradient(self._raw_coords(t), t, axis=-1)
+        A, d, f, p = (self.pendulums[..., i, None] for i in range(4))
+        phase = t * f + p
+        return A * np.exp(-d * t) * (f * np.cos(phase) - d * np.sin(phase))
+
+    @staticmethod
+    def _bounds(coords: np.ndarray) -> np.ndarray:
+        """Returns the (min, max) of the coordinates over their last two axes, i.e. over all axes and samples."""
+        return np.stack([coords.min(axis=(-2, -1)), coords.max(axis=(-2, -1))], axis=-1)
 
     @staticmethod
-    def _normalize(coords: list[np.ndarray], size: int) -> np.ndarray:
-        """Normalizes the provided coordinates array to fit the provided size dimensions."""
-        min_val = min(coord.min() for coord in coords)
-        max_val = max(coord.max() for coord in coords)
-        return [(coord - min_val) / (max_val - min_val) * size for coord in coords]
+    def _normalize(coords: np.ndarray, size: int, bounds: np.ndarray = None) -> np.ndarray:
+        """Normalizes the provided coordinates array to fit the provided size dimensions. Every (dims, samples) slice
+        is normalized by its own (min, max) bounds, which default to those of the coordinates themselves. Coordinates
+        past estimated bounds are clamped to [0, size]."""
+        if bounds is None:
+            bounds = Harmonograph._bounds(coords)
+        min_val, max_val = bounds[..., 0, None, None], bounds[..., 1, None, None]
+        normalized = (coords - min_val) / (max_val - min_val) * size
+        return np.clip(normalized, 0, size, out=normalized)
+
+    def _normalize_components(self, raw: np.ndarray, size: int, pendulum_bounds: np.ndarray = None,
+                              sum_bounds: np.ndarray = None) -> tuple[np.ndarray, np.ndarray]:
+        """Helper method returning the normalized pendulum coordinates and their normalized sum"""
+        components = self._normalize(raw, size, pendulum_bounds)
+        return components, self._normalize(components.sum(axis=-3), size, sum_bounds)
+
+    def _evaluate(self, t: np.ndarray, size: int, pendulum_bounds: np.ndarray = None,
+                  sum_bounds: np.ndarray = None) -> tuple[np.ndarray, np.ndarray]:
+        """Helper method returning the normalized pendulum coordinates and their normalized sum at the given time
+        points"""
+        return self._normalize_components(self._raw_coords(t), size, pendulum_bounds, sum_bounds)
+
+    def evaluate(self, size: int) -> tuple[np.ndarray, np.ndarray]:
+        """Calculates the coordinates of every pendulum and of the harmonograph in one pass across the array of time
+        points (self.t). Returns the (pendulums, dims, samples) and (dims, samples) arrays."""
+        return self._normalize_components(self._raw_range(0, self.t_samples), size)
+
+    def evaluate_at(self, indices: np.ndarray, size: int, bounds: tuple) -> tuple[np.ndarray, np.ndarray]:
+        """Calculates the normalized pendulum coordinates and coordinates at the given sample indices, using bounds from
+        normalization_bounds."""
+        return self._evaluate(self.time_at(indices), size, *bounds)
 
     def get_coords(self, size) -> np.ndarray:
         """Calculates and returns the coordinates of the harmonograph across the array of time points (self.t)."""
-        coords = [np.zeros(self.t_samples) for _ in range(self.dim)]
-        for pendulum_params in self._get_pendulums():
-            for axis, pendulum_coord in enumerate(self._compute_coords(pendulum_params, size)):
-                coords[axis] += pendulum_coord
-        return self._normalize(coords, size)
+        return self.evaluate(size)[1]
 
-    def get_pendulum_coords(self, size) -> list:
+    def get_pendulum_coords(self, size) -> np.ndarray:
         """Calculates and returns the coordinates of each pendulum independently across the array of time points (self.t)."""
-        return [self._compute_coords(pendulum_params, size) for pendulum_params in self._get_pendulums()]
+        return self.evaluate(size)[0]
+
+    def _periods(self) -> float:
+        """Helper method returning the number of periods the fastest pendulum swings from t_start to t_end"""
+        frequencies = self._parameters(np.linspace(self.t_start, self.t_end, 1024))[..., 2, :]
+        return (self.t_end - self.t_start) * np.abs(frequencies).max() / (2 * np.pi)
+
+    def arc_length_times(self, size: int, spacing: float = 1.0) -> np.ndarray:
+        """Returns time points spaced evenly along the curve, about spacing pixels apart along the major axis when
+        drawn at the given size, and never more than t_samples of them.
+
+        The curve's speed in pixels follows from the analytic derivative of every pendulum, scaled by the
+        normalizations. It is integrated on a grid fine enough for the fastest pendulum, with normalization bounds
+        estimated on that grid, and the times of evenly spaced arc lengths are interpolated from the integral.
+        """
+        grid = int(np.clip(self._periods() * ARC_GRID_SAMPLES_PER_PERIOD, 1024, max(self.t_samples, 1024)))
+        t = np.linspace(self.t_start, self.t_end, grid)
+
+        raw = self._raw_coords(t)
+        pendulum_bounds = self._bounds(raw)
+        sum_bounds = self._bounds(self._normalize(raw, size, pendulum_bounds).sum(axis=-3))
+        scales = size / (pendulum_bounds[:, 1] - pendulum_bounds[:, 0])
+        velocity = (self._raw_velocity(t) * scales[:, None, None]).sum(axis=0) * size / (sum_bounds[1] - sum_bounds[0])
+
+        # Bresenham draws max(|dx|, |dy|) pixels per segment, so lengths are measured along the major axis
+        speed = np.abs(velocity[:2]).max(axis=0)
+        length = np.concatenate([[0], np.cumsum((speed[1:] + speed[:-1]) / 2 * np.diff(t))])
+        samples = int(np.clip(np.ceil(length[-1] / spacing) + 1, 2, self.t_samples))
+        return np.interp(np.linspace(0, length[-1], samples), length, t)
+
+    def _chunk_ranges(self, start: int, stop: int, chunk_size: int):
+        """Yields (start, stop) sample ranges covering [start, stop) in chunks of chunk_size."""
+        for chunk_start in range(start, stop, chunk_size):
+            yield chunk_start, min(chunk_start + chunk_size, stop)
+
+    def bounds_samples(self) -> int:
+        """Returns how many of the time points normalization_bounds evaluates in each of its two passes."""
+        return int(np.clip(self._periods() * BOUNDS_SAMPLES_PER_PERIOD, min(self.t_samples, 1024), self.t_samples))
+
+    def normalization_bounds(self, size: int, chunk_size: int = CHUNK_SIZE, progress=None) -> tuple:
+        """Estimates the (min, max) normalization bounds of every pendulum and of their sum by streaming over evenly
+        strided time points in chunks, BOUNDS_SAMPLES_PER_PERIOD of them per period of the fastest pendulum, so that
+        the cost of the estimate depends on how fast the curve turns rather than on t_samples. With fewer time points
+        than that every one of them is used and the bounds are exact; otherwise the extremes between the strided
+        points are missed by a fraction of a pixel and clamped. If given, progress is called with the completed
+        fraction of both passes after every chunk; it may raise to abort.
+
+        Returns a (pendulum_bounds, sum_bounds) tuple of (..., pendulums, 2) and (..., 2) arrays for iter_coords.
+        """
+        samples = self.bounds_samples()
+        # The first and last time points are always included, as the slowest curves often peak at an end
+        indices = np.linspace(0, self.t_samples - 1, samples).astype(np.int64)
+        with span('normalization', samples=2 * samples):
+            pendulum_bounds = np.tile([np.inf, -np.inf], (*self.batch_shape, self.n_pendulums, 1))
+            for start, stop in self._chunk_ranges(0, samples, chunk_size):
+                chunk_bounds = self._bounds(self._raw_coords(self.time_at(indices[start:stop])))
+                pendulum_bounds[..., 0] = np.minimum(pendulum_bounds[..., 0], chunk_bounds[..., 0])
+                pendulum_bounds[..., 1] = np.maximum(pendulum_bounds[..., 1], chunk_bounds[..., 1])
+                if progress is not None:
+                    progress(stop / (2 * samples))
+
+            # The bounds of the sum depend on the normalized pendulums, so they take a second pass
+            sum_bounds = np.tile([np.inf, -np.inf], (*self.batch_shape, 1))
+            for start, stop in self._chunk_ranges(0, samples, chunk_size):
+                components = self._normalize(self._raw_coords(self.time_at(indices[start:stop])), size,
+                                             pendulum_bounds)
+                chunk_bounds = self._bounds(components.sum(axis=-3))
+                sum_bounds[..., 0] = np.minimum(sum_bounds[..., 0], chunk_bounds[..., 0])
+                sum_bounds[..., 1] = np.maximum(sum_bounds[..., 1], chunk_bounds[..., 1])
+                if progress is not None:
+                    progress((samples + stop) / (2 * samples))
+        return pendulum_bounds, sum_bounds
+
+    def iter_coords(self, size: int, chunk_size: int = CHUNK_SIZE, start: int = 0, stop: int = None,
+                    bounds: tuple = None):
+        """Yields the normalized coordinates of the time points [start, stop) in chunks of at most chunk_size + 1
+        samples. Every chunk after the first begins with the last sample of the previous one, so that rasterizing
+        the chunks one after another draws the same polyline as the full coordinates.
+
+        Chunks are (pendulum coordinates, coordinates) pairs matching evaluate. Bounds from normalization_bounds can
+        be passed in to reuse them across calls.
+        """
+        stop = self.t_samples if stop is None else stop
+        pendulum_bounds, sum_bounds = self.normalization_bounds(size, chunk_size) if bounds is None else bounds
+
+        for chunk_start, chunk_stop in self._chunk_ranges(start, stop, chunk_size):
+            first = max(start, chunk_start - 1)
+            with span('coordinate evaluation', samples=chunk_stop - first):
+                coords = self._normalize_components(self._raw_range(first, chunk_stop), size, pendulum_bounds,
+                                                    sum_bounds)
+            yield coords
 
 
 if __name__=='__main__':
@@ -0,0 +1,114 @@
+from concurrent.futures import FIRST_EXCEPTION, ProcessPoolExecutor, wait
+from multiprocessing import get_context, shared_memory
+import atexit
+
+import numpy as np
+
+from harmonograph_mvc.models.harmonograph import CHUNK_SIZE
+from harmonograph_mvc.models.rasterizer import accumulate_layers
+
+_pools = {}
+# Seconds between progress reports, and so between cancellation checks, while waiting for the workers
+PROGRESS_INTERVAL = 0.1
+
+
+def get_pool(workers: int) -> ProcessPoolExecutor:
+    """Returns a process pool with the given number of workers, reusing it between renders.
+
+    Workers are spawned rather than forked so that they never inherit the GUI's threads or import PyQt5.
+    """
+    if workers not in _pools:
+        _pools[workers] = ProcessPoolExecutor(workers, mp_context=get_context('spawn'))
+    return _pools[workers]
+
+
+@atexit.register
+def shutdown_pools():
+    """Shuts down every pool created by get_pool."""
+    for pool in _pools.values():
+        pool.shutdown(cancel_futures=True)
+    _pools.clear()
+
+
+def chunk_bounds(segments: int, chunks: int) -> list[tuple[int, int]]:
+    """Splits the segment indices [0, segments) into contiguous (start, stop) ranges.
+
+    Segment i joins point i to point i + 1, so a chunk of segments [start, stop) reads points [start, stop]. The
+    point shared by two neighbouring chunks is the end of one segment and the start of the next, and since every
+    segment excludes its end point it is only ever drawn once.
+    """
+    edges = np.linspace(0, segments, chunks + 1).astype(int)
+    return [(start, stop) for start, stop in zip(edges[:-1], edges[1:]) if stop > start]
+
+
+def _rasterize_chunk(harmonograph, size: int, bounds: tuple, chunk_size: int, hits_name: str, shape: tuple,
+                     dtype: str, control_name: str, index: int, start: int, stop: int):
+    """Worker entry point: evaluates segments [start, stop) of the harmonograph and rasterizes them into a shared
+    layered hit buffer.
+
+    The shared control array holds the cancellation flag followed by the segments drawn by every worker. The flag is
+    checked before every chunk, so that a cancelled render frees its worker within one chunk.
+    """
+    hits_shm = shared_memory.SharedMemory(name=hits_name)
+    control_shm = shared_memory.SharedMemory(name=control_name)
+    try:
+        hits = np.ndarray(shape, dtype=dtype, buffer=hits_shm.buf)
+        control = np.ndarray(len(control_shm.buf) // 8, dtype=np.int64, buffer=control_shm.buf)
+        for pendulum_coords, coords in harmonograph.iter_coords(size, chunk_size, start, stop + 1, bounds):
+            if control[0]:
+                break
+            accumulate_layers(hits, pendulum_coords, coords)
+            control[1 + index] += coords.shape[-1] - 1
+        del hits, control
+    finally:
+        hits_shm.close()
+        control_shm.close()
+
+
+def rasterize_parallel(hits: np.ndarray, harmonograph, size: int, workers: int, bounds: tuple,
+                       chunk_size: int = CHUNK_SIZE, progress=None):
+    """Rasterizes the harmonograph across worker processes and adds the result to the (layers, width, height) hits
+    in place, with the pendulum paths in the layers past the first.
+
+    The time axis is split into one chunk per worker. Every worker streams the coordinates of its chunk with
+    Harmonograph.iter_coords using the shared normalization bounds and rasterizes them into its own shared hit
+    buffer, and the buffers are merged once all workers are done. If given, progress is called with the fraction of
+    segments drawn every PROGRESS_INTERVAL seconds; if it raises, the workers stop at their next chunk and the
+    pending ones are cancelled, so that a following render does not queue behind them.
+    """
+    chunks = chunk_bounds(harmonograph.t_samples - 1, workers)
+    if not chunks:
+        return
+
+    hit_shms = [shared_memory.SharedMemory(create=True, size=hits.nbytes) for _ in chunks]
+    control_shm = shared_memory.SharedMemory(create=True, size=8 * (len(chunks) + 1))
+    control = np.ndarray(len(chunks) + 1, dtype=np.int64, buffer=control_shm.buf)
+    control[:] = 0
+    try:
+        pool = get_pool(workers)
+        futures = []
+        for index, ((start, stop), hits_shm) in enumerate(zip(chunks, hit_shms)):
+            np.ndarray(hits.shape, dtype=hits.dtype, buffer=hits_shm.buf)[:] = 0
+            futures.append(pool.submit(_rasterize_chunk, harmonograph, size, bounds, chunk_size, hits_shm.name,
+                                       hits.shape, hits.dtype.str, control_shm.name, index, start, stop))
+        try:
+            pending = futures
+            while pending:
+                done, pending = wait(pending, PROGRESS_INTERVAL, FIRST_EXCEPTION)
+                for future in done:
+                    future.result()
+                if progress is not None:
+                    progress(control[1:].sum() / (harmonograph.t_samples - 1))
+        except BaseException:
+            control[0] = 1
+            for future in futures:
+                future.cancel()
+            raise
+
+        for hits_shm in hit_shms:
+            hits += np.ndarray(hits.shape, dtype=hits.dtype, buffer=hits_shm.buf)
+    finally:
+        del control
+        for shm in hit_shms + [control_shm]:
+            shm.close()
+            shm.unlink()
@@ -0,0 +1,196 @@
+import numpy as np
+
+from harmonograph_mvc.utils.profiler import count
+
+# Upper bound on the number of pixels expanded at once by the vectorized rasterizer
+PIXEL_BATCH = 1 << 20
+
+
+def bresenham_segments(x0: np.ndarray, y0: np.ndarray, x1: np.ndarray, y1: np.ndarray):
+    """Vectorized Bresenham over many segments at once.
+
+    Produces the same pixels as ImageBlender.bresenham for every segment, excluding each segment's last point as
+    it marks the beginning of the following line. Returns the x and y pixel index arrays.
+    """
+    dx = np.abs(x1 - x0)
+    dy = np.abs(y1 - y0)
+    x_major = dx > dy
+    major = np.maximum(dx, dy)
+    minor = np.minimum(dx, dy)
+
+    # Expand every segment into its pixel steps k = 0 .. major - 1
+    seg = np.repeat(np.arange(len(major)), major)
+    k = np.arange(len(seg)) - np.repeat(np.cumsum(major) - major, major)
+    major, minor, x_major = major[seg], minor[seg], x_major[seg]
+
+    # Number of minor axis steps taken after k major steps, i.e. ceil((2 * k * minor - major) / (2 * major)),
+    # which is what the error term of the scalar algorithm (starting at major / 2) accumulates to
+    m = (2 * k * minor + major - 1) // (2 * major)
+
+    px = x0[seg] + np.where(x0[seg] > x1[seg], -1, 1) * np.where(x_major, k, m)
+    py = y0[seg] + np.where(y0[seg] > y1[seg], -1, 1) * np.where(x_major, m, k)
+    return px, py
+
+
+def tiles_of_segments(x0, y0, x1, y1, tile_size: int):
+    """Pairs every segment with every tile its bounding box crosses.
+
+    Returns the segment indices and the (row, column) tile indices of each pair, sorted by tile.
+    """
+    tx0, tx1 = np.minimum(x0, x1) // tile_size, np.maximum(x0, x1) // tile_size
+    ty0, ty1 = np.minimum(y0, y1) // tile_size, np.maximum(y0, y1) // tile_size
+    rows, columns = tx1 - tx0 + 1, ty1 - ty0 + 1
+
+    # Almost every segment lies within a single tile; the few crossing tile edges are repeated once per tile
+    counts = rows * columns
+    segment = np.repeat(np.arange(len(x0)), counts)
+    offset = np.arange(len(segment)) - np.repeat(np.cumsum(counts) - counts, counts)
+    tile_x = tx0[segment] + offset // columns[segment]
+    tile_y = ty0[segment] + offset % columns[segment]
+
+    order = np.lexsort((tile_y, tile_x))
+    return segment[order], tile_x[order], tile_y[order]
+
+
+def hits_to_intensities(hits: np.ndarray, lut: np.ndarray, rows: int = 256) -> np.ndarray:
+    """Maps hit counts to uint8 intensities through the lookup table. Counts past the end of the table have saturated
+    and take its last value. Works through blocks of rows so that the index conversion np.take makes stays small.
+
+    Fractional densities from bilinear splatting are interpolated between the table's entries, which gives whole
+    counts exactly their table value."""
+    intensities = np.empty(hits.shape, dtype=np.uint8)
+    if hits.dtype.kind == 'f':
+        for start in range(0, len(hits), rows):
+            intensities[start:start + rows] = np.interp(hits[start:start + rows], np.arange(len(lut)), lut)
+        return intensities
+
+    lut = lut.astype(np.uint8)
+    for start in range(0, len(hits), rows):
+        np.take(lut, hits[start:start + rows], mode='clip', out=intensities[start:start + rows])
+    return intensities
+
+
+def composite_layers(hits: np.ndarray, lut: np.ndarray, colors: np.ndarray, rows: int = 256) -> np.ndarray:
+    """Blends (layers, width, height) hit counts into one (width, height, 3) uint8 RGB image, adding up every layer's
+    intensities scaled by its (red, green, blue) color and saturating at 255. Works through blocks of rows like
+    hits_to_intensities."""
+    colors = np.asarray(colors, dtype=np.uint16)
+    image = np.empty((*hits.shape[1:], 3), dtype=np.uint8)
+    for start in range(0, hits.shape[1], rows):
+        block = np.zeros((*hits[:, start:start + rows].shape[1:], 3), dtype=np.uint16)
+        for layer_hits, color in zip(hits[:, start:start + rows], colors):
+            intensities = hits_to_intensities(layer_hits, lut, rows)[..., None].astype(np.uint16)
+            block += intensities * color // 255
+        np.minimum(block, 255, out=block)
+        image[start:start + rows] = block
+    return image
+
+
+def alpha_lut(min_alpha: int, alpha_increment: float, max_hits: int) -> np.ndarray:
+    """Maps a pixel hit count to its intensity: the first hit sets min_alpha, every further hit adds alpha_increment
+    up to 255. Built by repeated addition so that values match the per-pixel update exactly."""
+    lut = [0.0, float(min_alpha)]
+    while len(lut) <= max_hits:
+        value = min(255, lut[-1] + alpha_increment)
+        if value == lut[-1]:
+            break
+        lut.append(value)
+    return np.array(lut[:max_hits + 1], dtype=np.float64)
+
+
+def rasterize_segments(hits: np.ndarray, x0: np.ndarray, y0: np.ndarray, x1: np.ndarray, y1: np.ndarray,
+                       progress=None):
+    """Rasterizes independent segments given by their integer end points and adds the crossed pixels to the
+    (width, height) hit count array in place. If given, progress is called with the completed fraction after
+    every batch.
+
+    Hits are counted with np.bincount over the range of pixels a batch touches and added into the hit array with
+    an unsafe cast, so that compact unsigned hit arrays can be accumulated into without a full-size temporary.
+    """
+    height = hits.shape[1]
+    lengths = np.maximum(np.abs(x1 - x0), np.abs(y1 - y0))
+    splits = np.searchsorted(np.cumsum(lengths), np.arange(PIXEL_BATCH, lengths.sum(), PIXEL_BATCH))
+    flat_hits = hits.reshape(-1)
+    count(segments=len(lengths), pixels=int(lengths.sum()))
+
+    for i, batch in enumerate(np.split(np.arange(len(lengths)), splits)):
+        if progress is not None:
+            progress(i / (len(splits) + 1))
+        px, py = bresenham_segments(x0[batch], y0[batch], x1[batch], y1[batch])
+        if not len(px):
+            continue
+        flat = px * height + py
+        low = flat.min()
+        counts = np.bincount(flat - low)
+        target = flat_hits[low:low + len(counts)]
+        np.add(target, counts, out=target, casting='unsafe')
+
+
+def rasterize_polyline(hits: np.ndarray, x: np.ndarray, y: np.ndarray, progress=None):
+    """Rasterizes the polyline through the given coordinates into the hit count array in place."""
+    x = np.asarray(x).astype(np.int64)
+    y = np.asarray(y).astype(np.int64)
+    rasterize_segments(hits, x[:-1], y[:-1], x[1:], y[1:], progress)
+
+
+def accumulate_layers(hits: np.ndarray, pendulum_coords: np.ndarray, coords: np.ndarray):
+    """Rasterizes one chunk of harmonograph coordinates into (layers, width, height) hit counts: the harmonograph into
+    layer 0 and pendulum i into layer i for as many layers as there are."""
+    rasterize_polyline(hits[0], coords[0], coords[1])
+    for layer_hits, (x, y, *_) in zip(hits[1:], pendulum_coords):
+        rasterize_polyline(layer_hits, x, y)
+
+
+def splat_points(hits: np.ndarray, x: np.ndarray, y: np.ndarray, bilinear: bool = False):
+    """Adds every sample to the (width, height) density array in place, without connecting consecutive samples.
+
+    By default a sample counts once towards the pixel it falls in, the same pixel a line would start from. Bilinear
+    splatting spreads it over the four nearest pixels by its sub-pixel position instead, which needs a floating point
+    density array.
+    """
+    width, height = hits.shape
+    flat_hits = hits.reshape(-1)
+    count(samples=len(x))
+    if bilinear:
+        x0, y0 = np.floor(x), np.floor(y)
+        fx, fy = x - x0, y - y0
+        x0, y0 = x0.astype(np.int64), y0.astype(np.int64)
+        # Neighbours past the last pixel only occur with zero weight, at the maximum coordinate
+        corners = [(x0, y0, (1 - fx) * (1 - fy)), (np.minimum(x0 + 1, width - 1), y0, fx * (1 - fy)),
+                   (x0, np.minimum(y0 + 1, height - 1), (1 - fx) * fy),
+                   (np.minimum(x0 + 1, width - 1), np.minimum(y0 + 1, height - 1), fx * fy)]
+    else:
+        corners = [(x.astype(np.int64), y.astype(np.int64), None)]
+
+    for px, py, weights in corners:
+        flat = px * height + py
+        low = flat.min()
+        counts = np.bincount(flat - low, weights)
+        target = flat_hits[low:low + len(counts)]
+        np.add(target, counts, out=target, casting='unsafe')
+
+
+def splat_layers(hits: np.ndarray, pendulum_coords: np.ndarray, coords: np.ndarray, bilinear: bool = False):
+    """Splats one chunk of harmonograph coordinates into layered densities like accumulate_layers."""
+    splat_points(hits[0], coords[0], coords[1], bilinear)
+    for layer_hits, (x, y, *_) in zip(hits[1:], pendulum_coords):
+        splat_points(layer_hits, x, y, bilinear)
+
+
+def accumulate_segment_layers(hits: np.ndarray, start: tuple, end: tuple):
+    """Rasterizes independent segments between two (pendulum coordinates, coordinates) evaluations into layered hit
+    counts, the harmonograph into layer 0 and pendulum i into layer i for as many layers as there are."""
+    (start_components, start_coords), (end_components, end_coords) = start, end
+    layers = [(start_coords, end_coords)] + list(zip(start_components, end_components))
+    for layer_hits, (a, b) in zip(hits, layers):
+        a, b = a.astype(np.int64), b.astype(np.int64)
+        rasterize_segments(layer_hits, a[0], a[1], b[0], b[1])
+
+
+def progressive_passes(stride: int) -> list[list[int]]:
+    """Groups the segment offsets 0 .. stride - 1 into passes of doubling size in bit-reversed order, so that every
+    pass refines the previous ones evenly: [0], [stride / 2], [stride / 4, 3 * stride / 4], ... The stride must be a
+    power of two."""
+    bits = stride.bit_length() - 1
+    order = sorted(range(stride), key=lambda offset: int(f'{offset:0{bits}b}'[::-1] or '0', 2))
+    return [order[:1]] + [order[2 ** k:2 ** (k + 1)] for k in range(bits)]
@@ -1,53 +1,128 @@
-from PyQt5.QtGui import QImage, QColor
 import numpy as np
 
-import time
+from harmonograph_mvc.models.harmonograph import CHUNK_SIZE
+from harmonograph_mvc.models.rasterizer import accumulate_layers, accumulate_segment_layers, alpha_lut, \
+    composite_layers, hits_to_intensities, progressive_passes, rasterize_polyline, rasterize_segments, splat_layers
+from harmonograph_mvc.models.parallel_renderer import rasterize_parallel
+from harmonograph_mvc.utils.profiler import span
+
+# Lines connect consecutive samples; the density modes splat the samples alone, to the nearest pixel or bilinearly
+RENDER_MODES = ('lines', 'density', 'bilinear')
+# Version of the hit counts rendered here, to be raised whenever a change alters them so stored renders are not reused
+RENDERER_VERSION = 1
+
 
 class ImageBlender:
-    """Blends images and creates the image of the harmonograph."""
-    def __init__(self, width: int, height: int, min_alpha: int = 25, steps: int = 10):
-        """Initializes the image blender."""
+    """Blends images and creates the image of the harmonograph as a plain (width, height) uint8 intensity array, so
+    that rendering works without PyQt5. Conversion to a QImage is left to the views.
+
+    Hit counts are kept in one or more layers: layer 0 holds the harmonograph itself and, when accumulating a
+    harmonograph, layer i holds the path of pendulum i. In the density render modes the counts are of samples rather
+    than of lines crossing a pixel, and fractional in the bilinear mode.
+    """
+    def __init__(self, width: int, height: int, min_alpha: int = 25, steps: int = 10, workers: int = 1,
+                 layers: int = 1, mode: str = 'lines'):
+        """Initializes the image blender. With more than one worker, harmonographs are rasterized in parallel
+        processes in the lines render mode."""
+        if mode not in RENDER_MODES:
+            raise ValueError(f"Unknown render mode '{mode}', expected one of {', '.join(RENDER_MODES)}")
         self.width = width
         self.height = height
         self.min_alpha = min_alpha
         self.alpha_increment = (255 - min_alpha) / steps
+        self.workers = workers
+        self.layers = layers
+        self.mode = mode
 
         self.reset()
 
     def reset(self):
-        """Resets the image, the draw object, the intensities, and the set of crossed pixels."""
-        self.intensities = np.zeros((self.width, self.height), dtype=np.float64)
-        self.crossed_pixels = np.zeros((self.width, self.height), dtype=bool)
-        self.image = QImage(self.width, self.height, QImage.Format_RGB32)
+        """Resets the per-pixel hit counts. A pixel has been crossed once its count is non-zero."""
+        dtype = np.float32 if self.mode == 'bilinear' else np.uint32
+        self.hits = np.zeros((self.layers, self.width, self.height), dtype=dtype)
 
-    def blend(self, x: np.ndarray[int], y: np.ndarray[int]) -> QImage:
-        """Blends the image based on the given x and y coordinates."""
-        xi_prev, yi_prev = int(x[0]), int(y[0])
-        for i in range(1, len(x)):
-            xi, yi = int(x[i]), int(y[i])
+    def accumulate(self, x: np.ndarray, y: np.ndarray, progress=None, layer: int = 0):
+        """Rasterizes the polyline through the given x and y coordinates and adds the crossed pixels to the hit
+        counts. If given, progress is called with the completed fraction as rasterization advances."""
+        rasterize_polyline(self.hits[layer], x, y, progress)
+
+    def accumulate_segments(self, x0: np.ndarray, y0: np.ndarray, x1: np.ndarray, y1: np.ndarray, progress=None,
+                            layer: int = 0):
+        """Rasterizes independent segments given by their integer end points and adds them to the hit counts."""
+        rasterize_segments(self.hits[layer], x0, y0, x1, y1, progress)
 
-            # Exclude last point in line to avoid repetition as it marks the beginning of the following line
-            for px, py in list(self.bresenham(xi_prev, yi_prev, xi, yi))[:-1]:
-                # px, py = min(px, self.width - 1), min(py, self.height - 1)  # Ensure the coordinates are within the array bounds
+    def accumulate_harmonograph(self, harmonograph, size: int, bounds: tuple = None, chunk_size: int = CHUNK_SIZE,
+                                progress=None):
+        """Streams the coordinates of the harmonograph chunk by chunk into the hit counts, so that memory use depends
+        on chunk_size rather than the number of time samples. Every layer past the first receives the path of one
+        pendulum from the same evaluation."""
+        bounds = harmonograph.normalization_bounds(size, chunk_size) if bounds is None else bounds
+        if self.workers > 1 and self.mode == 'lines':
+            with span('parallel rasterization', samples=harmonograph.t_samples, workers=self.workers):
+                rasterize_parallel(self.hits, harmonograph, size, self.workers, bounds, chunk_size, progress)
+            return
 
-                if not self.crossed_pixels[px, py]:
-                    self.intensities[px, py] = self.min_alpha
-                    self.crossed_pixels[px, py] = True
+        chunks = -(-harmonograph.t_samples // chunk_size)
+        for i, (pendulum_coords, coords) in enumerate(harmonograph.iter_coords(size, chunk_size, bounds=bounds)):
+            if progress is not None:
+                progress(i / chunks)
+            with span('rasterization', layers=self.layers):
+                if self.mode == 'lines':
+                    accumulate_layers(self.hits, pendulum_coords, coords)
                 else:
-                    self.intensities[px, py] = min(255, self.intensities[px, py] + self.alpha_increment)
+                    # Chunks after the first repeat the previous chunk's last sample, which must only be counted once
+                    first = 0 if i == 0 else 1
+                    splat_layers(self.hits, pendulum_coords[..., first:], coords[..., first:],
+                                 self.mode == 'bilinear')
 
-            xi_prev, yi_prev = xi, yi
+    def iter_progressive(self, harmonograph, size: int, stride: int = 16, bounds: tuple = None,
+                         chunk_size: int = CHUNK_SIZE):
+        """Rasterizes the harmonograph in passes over interleaved subsets of its segments, yielding the fraction of
+        segments drawn after every pass so that the image can be shown while it is refined.
 
-        # Convert intensities array to QImage
-        img_array_uint8 = self.intensities.astype(np.uint8).copy()  # copy the array and convert it to uint8 type
-        img_array_qcolor = np.stack([img_array_uint8] * 3,
-                                    axis=-1)  # repeat array 3 times along a new axis to create RGB image
-        height, width = img_array_qcolor.shape[:2]
-        bytes_per_line = 3 * width  # number of bytes in a line (3 bytes per pixel for RGB)
+        Segment i joins samples i and i + 1. The first pass draws every stride-th segment and every later pass fills
+        in more offsets into the same hit counts, never redrawing a segment, so that after the last pass the hit
+        counts equal those of accumulate_harmonograph. The density modes have no segments to interleave and are
+        drawn in a single pass.
+        """
+        if self.mode != 'lines':
+            self.accumulate_harmonograph(harmonograph, size, bounds, chunk_size)
+            yield 1.0
+            return
 
-        # Create QImage from the numpy array
-        self.image = QImage(img_array_qcolor.data, width, height, bytes_per_line, QImage.Format_RGB888)
-        return self.image
+        bounds = harmonograph.normalization_bounds(size, chunk_size) if bounds is None else bounds
+        segments = harmonograph.t_samples - 1
+        drawn = 0
+        for offsets in progressive_passes(stride):
+            with span('progressive pass', offsets=len(offsets)):
+                for offset in offsets:
+                    for chunk_start in range(offset, segments, stride * chunk_size):
+                        indices = np.arange(chunk_start, min(chunk_start + stride * chunk_size, segments), stride)
+                        with span('coordinate evaluation', samples=2 * len(indices)):
+                            start, end = (harmonograph.evaluate_at(indices, size, bounds),
+                                          harmonograph.evaluate_at(indices + 1, size, bounds))
+                        with span('rasterization', layers=self.layers):
+                            accumulate_segment_layers(self.hits, start, end)
+                        drawn += len(indices)
+            yield drawn / max(segments, 1)
+
+    def get_image(self, layer: int = 0) -> np.ndarray:
+        """Converts the accumulated hit counts of a layer to a uint8 intensity array."""
+        hits = self.hits[layer]
+        with span('intensity mapping', pixels=hits.size):
+            max_hits = int(np.ceil(hits.max()))
+            return hits_to_intensities(hits, alpha_lut(self.min_alpha, self.alpha_increment, max_hits))
+
+    def get_composite(self, colors) -> np.ndarray:
+        """Blends all layers into a uint8 RGB array, every layer drawn additively in its (red, green, blue) color."""
+        with span('compositing', pixels=self.hits[0].size, layers=len(self.hits)):
+            lut = alpha_lut(self.min_alpha, self.alpha_increment, int(np.ceil(self.hits.max())))
+            return composite_layers(self.hits, lut, colors)
+
+    def blend(self, x: np.ndarray[int], y: np.ndarray[int], progress=None) -> np.ndarray:
+        """Blends the image based on the given x and y coordinates."""
+        self.accumulate(x, y, progress)
+        return self.get_image()
 
     @staticmethod
     def bresenham(x0: int, y0: int, x1: int, y1: int):
@@ -76,4 +151,4 @@ class ImageBlender:
                     x += sx
                     err += dy
                 y += sy
-        yield x, y
\ No newline at end of file
+        yield x, y
@@ -0,0 +1,57 @@
+import numpy as np
+
+from harmonograph_mvc.models.harmonograph import CHUNK_SIZE, Harmonograph, HarmonographParams
+from harmonograph_mvc.models.rasterizer import alpha_lut, hits_to_intensities, rasterize_segments
+
+
+def sweep_params(params: HarmonographParams, cell: tuple, values) -> HarmonographParams:
+    """Returns parameters holding one set per value, with the (pendulum, axis, parameter) cell of the pendulum array
+    set to that value, replacing any expression of the cell. The pendulum array gains a leading axis of len(values)
+    sets."""
+    pendulums = np.repeat(params.pendulums[None], len(values), axis=0)
+    pendulums[(slice(None), *cell)] = values
+    expressions = {key: expression for key, expression in params.expressions.items() if key != tuple(cell)}
+    return HarmonographParams(pendulums, params.t_start, params.t_end, params.t_samples, params.times, expressions)
+
+
+def sheet_layout(sets: int, thumb_size: int, columns: int = None, gap: int = 4):
+    """Lays out the thumbnails of a contact sheet in a grid, square by default.
+
+    Returns the (rows, columns) shape of the sheet in pixels and the (sets, 2) pixel origins of the thumbnails.
+    """
+    columns = columns or int(np.ceil(np.sqrt(sets)))
+    rows = -(-sets // columns)
+    pitch = thumb_size + gap
+    index = np.arange(sets)
+    origins = np.stack([index // columns * pitch, index % columns * pitch], axis=1)
+    return (rows * pitch - gap, columns * pitch - gap), origins
+
+
+def render_contact_sheet(params: HarmonographParams, thumb_size: int, columns: int = None, gap: int = 4,
+                         min_alpha: int = 25, steps: int = 45, chunk_size: int = CHUNK_SIZE, progress=None):
+    """Renders every set of batched parameters, e.g. from sweep_params, as a thumbnail of a contact sheet.
+
+    All sets are evaluated together as one broadcast array, and the segments of every thumbnail of a time chunk are
+    shifted to their place on the sheet and rasterized together into a single hit buffer. The chunk size is divided
+    among the sets so that memory use does not grow with their number. If given, progress is called with the
+    completed fraction. Returns the uint8 intensities of the sheet and the thumbnail origins.
+    """
+    harmonograph = Harmonograph(params)
+    sets = len(params.pendulums)
+    shape, origins = sheet_layout(sets, thumb_size, columns, gap)
+    hits = np.zeros(shape, dtype=np.uint32)
+
+    size = thumb_size - 1
+    chunk_size = max(1024, chunk_size // sets)
+    bounds = harmonograph.normalization_bounds(size, chunk_size)
+    chunks = -(-params.t_samples // chunk_size)
+    for i, (_, coords) in enumerate(harmonograph.iter_coords(size, chunk_size, bounds=bounds)):
+        x = coords[:, 0].astype(np.int64) + origins[:, 0, None]
+        y = coords[:, 1].astype(np.int64) + origins[:, 1, None]
+        # Segments only join consecutive samples of the same set
+        rasterize_segments(hits, x[:, :-1].ravel(), y[:, :-1].ravel(), x[:, 1:].ravel(), y[:, 1:].ravel())
+        if progress is not None:
+            progress((i + 1) / chunks)
+
+    lut = alpha_lut(min_alpha, (255 - min_alpha) / steps, int(hits.max()))
+    return hits_to_intensities(hits, lut), origins
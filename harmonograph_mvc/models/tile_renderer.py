@@ -0,0 +1,103 @@
+import numpy as np
+
+from harmonograph_mvc.models.rasterizer import alpha_lut, bresenham_segments, hits_to_intensities, tiles_of_segments
+from harmonograph_mvc.utils.render_cache import RenderCache
+
+TILE_SIZE = 256
+CELL_SIZE = 16
+
+
+class SegmentIndex:
+    """A grid over the image that lists the segments whose bounding boxes overlap each cell.
+
+    Segment i joins samples i and i + 1. Segment numbers are stored sorted by cell, with the start of every cell's run
+    in starts, so that the cells of a grid row are one contiguous slice.
+    """
+    def __init__(self, x: np.ndarray, y: np.ndarray, width: int, height: int, cell_size: int = CELL_SIZE):
+        self.cell_size = cell_size
+        self.shape = (-(-width // cell_size), -(-height // cell_size))
+        x, y = np.floor(x).astype(np.int64), np.floor(y).astype(np.int64)
+        segments, cell_x, cell_y = tiles_of_segments(x[:-1], y[:-1], x[1:], y[1:], cell_size)
+        counts = np.bincount(cell_x * self.shape[1] + cell_y, minlength=self.shape[0] * self.shape[1])
+        self.segments = segments
+        self.starts = np.concatenate([[0], np.cumsum(counts)])
+
+    def query(self, x_start: float, x_stop: float, y_start: float, y_stop: float) -> np.ndarray:
+        """Returns the sorted numbers of the segments whose bounding boxes may overlap [x_start, x_stop) x
+        [y_start, y_stop)."""
+        first_x, last_x = max(int(x_start // self.cell_size), 0), min(int(-(-x_stop // self.cell_size)), self.shape[0])
+        first_y, last_y = max(int(y_start // self.cell_size), 0), min(int(-(-y_stop // self.cell_size)), self.shape[1])
+        if first_x >= last_x or first_y >= last_y:
+            return np.empty(0, dtype=np.int64)
+        runs = [self.segments[self.starts[row * self.shape[1] + first_y]:self.starts[row * self.shape[1] + last_y]]
+                for row in range(first_x, last_x)]
+        return np.unique(np.concatenate(runs))
+
+
+class TileRenderer:
+    """Re-rasterizes square tiles of a harmonograph image at a magnification, for zooming into it.
+
+    The curve is evaluated once at the image's own size and indexed by SegmentIndex, so a tile only rasterizes the
+    segments that can cross it, scaled by the zoom level. Finished tiles are kept in a RenderCache so that panning
+    back to them is a lookup. A renderer is not thread-safe; the GUI uses it from a single TileWorker thread.
+    """
+    def __init__(self, harmonograph, width: int, height: int, min_alpha: int = 25, steps: int = 10,
+                 tile_size: int = TILE_SIZE, cache_bytes: int = 64 * 2 ** 20):
+        self.harmonograph = harmonograph
+        self.width = width
+        self.height = height
+        self.min_alpha = min_alpha
+        self.alpha_increment = (255 - min_alpha) / steps
+        self.tile_size = tile_size
+        self.cache = RenderCache(cache_bytes)
+        self.x = self.y = self.index = None
+
+    def build_index(self):
+        """Evaluates the curve and indexes its segments, unless that was done already. The coordinates are streamed
+        chunk by chunk into arrays of the curve's length rather than collected and joined."""
+        if self.index is not None:
+            return
+        size = min(self.width, self.height) - 1
+        x, y = np.empty(self.harmonograph.t_samples), np.empty(self.harmonograph.t_samples)
+        position = 0
+        for i, (_, coords) in enumerate(self.harmonograph.iter_coords(size)):
+            # Chunks after the first repeat the previous chunk's last sample
+            coords = coords[:, int(i > 0):]
+            x[position:position + coords.shape[1]], y[position:position + coords.shape[1]] = coords[:2]
+            position += coords.shape[1]
+        self.x, self.y = x, y
+        self.index = SegmentIndex(x, y, self.width, self.height)
+
+    def tiles(self, zoom: int, x_start: float, x_stop: float, y_start: float, y_stop: float):
+        """Returns the (row, column) tiles of the zoom level covering the given region of the unzoomed image."""
+        scale = self.tile_size / zoom
+        rows = range(max(int(x_start // scale), 0), min(int(-(-x_stop // scale)), int(-(-self.width // scale))))
+        columns = range(max(int(y_start // scale), 0), min(int(-(-y_stop // scale)), int(-(-self.height // scale))))
+        return [(row, column) for row in rows for column in columns]
+
+    def render_tile(self, zoom: int, row: int, column: int) -> np.ndarray:
+        """Returns the (tile_size, tile_size) uint8 intensities of a tile of the image magnified zoom times.
+
+        Coordinates are scaled before being floored to pixels, so that neighbouring tiles continue each other's lines
+        and zoom level 1 reproduces the unzoomed image.
+        """
+        tile = self.cache.get((zoom, row, column))
+        if tile is not None:
+            return tile
+
+        self.build_index()
+        scale = self.tile_size / zoom
+        segments = self.index.query(row * scale, (row + 1) * scale, column * scale, (column + 1) * scale)
+        x0, y0 = np.floor(self.x[segments] * zoom).astype(np.int64), np.floor(self.y[segments] * zoom).astype(np.int64)
+        x1 = np.floor(self.x[segments + 1] * zoom).astype(np.int64)
+        y1 = np.floor(self.y[segments + 1] * zoom).astype(np.int64)
+        px, py = bresenham_segments(x0, y0, x1, y1)
+        px, py = px - row * self.tile_size, py - column * self.tile_size
+
+        # Segments reaching into the tile are drawn whole, and their pixels outside of it dropped
+        inside = (px >= 0) & (px < self.tile_size) & (py >= 0) & (py < self.tile_size)
+        hits = np.bincount(px[inside] * self.tile_size + py[inside], minlength=self.tile_size ** 2)
+        hits = hits.reshape(self.tile_size, self.tile_size)
+        tile = hits_to_intensities(hits, alpha_lut(self.min_alpha, self.alpha_increment, int(hits.max())))
+        self.cache.put((zoom, row, column), tile)
+        return tile
@@ -0,0 +1,167 @@
+"""Morph frame sequence export.
+
+Renders a clip in which the harmonograph morphs between keyframed parameter sets, across a process pool, without
+starting Qt:
+
+    python -m harmonograph_mvc.morph keyframes.json --frames 120 --out morph --format apng --workers 4
+
+Keyframes are read like a batch catalog, a JSON list or a CSV file of parameter sets (see harmonograph_mvc.batch),
+each optionally placed at a "frame"; keyframes without one are spread evenly over the clip. The pendulum parameters
+and t_start and t_end are interpolated between neighbouring keyframes, linearly or with a smooth ease in and out,
+and t_samples is taken from the first keyframe. Frames are written as an ordered PNG sequence or a single animated
+PNG. At most --in-flight frames are rendered or waiting to be written at any time, so memory use does not grow with
+the clip's length. Per-frame timings and the aggregate throughput are printed and kept in morph.json.
+"""
+from collections import deque
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from harmonograph_mvc.batch import load_catalog
+from harmonograph_mvc.models.harmonograph import KERNELS, Harmonograph, HarmonographParams
+from harmonograph_mvc.models.renderer import ImageBlender
+from harmonograph_mvc.utils.png import ApngWriter, compress_image, write_png
+
+EASINGS = ('linear', 'smooth')
+
+
+def keyframe_positions(keyframes: list[dict], frames: int) -> np.ndarray:
+    """Returns the frame of every keyframe, spreading those without a "frame" evenly over the clip."""
+    default = np.linspace(0, frames - 1, len(keyframes))
+    positions = np.array([float(keyframe.get('frame', position)) for keyframe, position in zip(keyframes, default)])
+    if np.any(np.diff(positions) <= 0):
+        raise ValueError("Keyframes must be placed at increasing frames")
+    return positions
+
+
+def frame_params(keyframes: list[dict], frames: int, easing: str = 'linear'):
+    """Yields the interpolated HarmonographParams of every frame of the clip."""
+    positions = keyframe_positions(keyframes, frames)
+    pendulums = np.array([keyframe['pendulums'] for keyframe in keyframes], dtype=np.float64)
+    t_ranges = np.array([[float(keyframe['t_start']), float(keyframe['t_end'])] for keyframe in keyframes])
+    t_samples = int(float(keyframes[0]['t_samples']))
+
+    for frame in range(frames):
+        # Frames before the first or after the last keyframe hold that keyframe
+        i = int(np.clip(np.searchsorted(positions, frame, side='right') - 1, 0, max(len(keyframes) - 2, 0)))
+        j = min(i + 1, len(keyframes) - 1)
+        u = float(np.clip((frame - positions[i]) / (positions[j] - positions[i]), 0, 1)) if j > i else 0.0
+        if easing == 'smooth':
+            u = u * u * (3 - 2 * u)
+        t_start, t_end = (1 - u) * t_ranges[i] + u * t_ranges[j]
+        yield HarmonographParams((1 - u) * pendulums[i] + u * pendulums[j], t_start, t_end, t_samples)
+
+
+def render_frame(index: int, params: HarmonographParams, path: str, size: int, min_alpha: int, steps: int,
+                 kernel: str):
+    """Renders one frame in a worker process. A PNG sequence frame is written to path directly; without a path the
+    compressed image data is returned for an animated PNG. Returns the frame's timings and the data or None."""
+    start = time.perf_counter()
+    blender = ImageBlender(size, size, min_alpha, steps)
+    blender.accumulate_harmonograph(Harmonograph(params, kernel), size - 1)
+    image = blender.get_image()
+    render_time = time.perf_counter() - start
+
+    data = None
+    if path is None:
+        data = compress_image(image)
+    else:
+        write_png(path, image)
+    return {
+        'frame': index,
+        'path': path,
+        'render_seconds': render_time,
+        'encode_seconds': time.perf_counter() - start - render_time,
+    }, data
+
+
+def run_morph(keyframes: list[dict], frames: int, out: str, output_format: str = 'png', workers: int = None,
+              in_flight: int = None, size: int = 1000, min_alpha: int = 25, steps: int = 45, fps: float = 30.0,
+              easing: str = 'linear', kernel: str = 'exact') -> dict:
+    """Renders every frame of the morph across a pool of worker processes and writes them, in order, as PNG files in
+    the out directory or as the animated PNG out. Returns the report that is also written to morph.json."""
+    if frames < 1:
+        raise ValueError("A clip needs at least one frame")
+    workers = workers or os.cpu_count()
+    in_flight = in_flight or 2 * workers
+    out_dir = out if output_format == 'png' else os.path.dirname(os.path.abspath(out))
+    os.makedirs(out_dir, exist_ok=True)
+    writer = ApngWriter(out, size, size, frames, fps=fps) if output_format == 'apng' else nullcontext()
+
+    start = time.perf_counter()
+    results = []
+    pending = deque()
+
+    def finish(future, apng):
+        """Waits for the oldest frame, so that frames are written in order, and reports it."""
+        result, data = future.result()
+        if apng is not None:
+            apng.write_frame(data)
+        result['done_seconds'] = time.perf_counter() - start
+        results.append(result)
+        print(f"frame {result['frame']:>5}: rendered in {result['render_seconds']:.3f}s, encoded in "
+              f"{result['encode_seconds']:.3f}s, {len(results) / result['done_seconds']:.2f} frames/s")
+
+    with writer as apng, ProcessPoolExecutor(workers, mp_context=get_context('spawn')) as pool:
+        for index, params in enumerate(frame_params(keyframes, frames, easing)):
+            path = os.path.join(out, f'frame_{index:05d}.png') if apng is None else None
+            pending.append(pool.submit(render_frame, index, params, path, size, min_alpha, steps, kernel))
+            # Frames are rendered ahead of the one being written, but never more than in_flight of them
+            if len(pending) >= in_flight:
+                finish(pending.popleft(), apng)
+        while pending:
+            finish(pending.popleft(), apng)
+
+    wall = time.perf_counter() - start
+    render_seconds = [result['render_seconds'] for result in results]
+    report = {
+        'frames': results,
+        'format': output_format,
+        'size': size,
+        'workers': workers,
+        'in_flight': in_flight,
+        'wall_seconds': wall,
+        'frames_per_second': frames / wall,
+        'samples_per_second': frames * int(float(keyframes[0]['t_samples'])) / wall,
+        'mean_render_seconds': float(np.mean(render_seconds)),
+        'max_render_seconds': float(np.max(render_seconds)),
+    }
+    with open(os.path.join(out_dir, 'morph.json'), 'w') as file:
+        json.dump(report, file, indent=2)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('keyframes', help="JSON or CSV file of keyframe parameter sets")
+    parser.add_argument('--frames', type=int, required=True, help="number of frames of the clip")
+    parser.add_argument('--out', default='morph', help="output directory, or the .png file of an animated PNG")
+    parser.add_argument('--format', choices=['png', 'apng'], default='png', help="PNG sequence or animated PNG")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes, defaults to the CPU count")
+    parser.add_argument('--in-flight', type=int, default=None,
+                        help="most frames rendered or awaiting writing at once, defaults to twice the workers")
+    parser.add_argument('--size', type=int, default=1000, help="frame width and height in pixels")
+    parser.add_argument('--min-alpha', type=int, default=25)
+    parser.add_argument('--steps', type=int, default=45)
+    parser.add_argument('--fps', type=float, default=30.0, help="frame rate of the animated PNG")
+    parser.add_argument('--easing', choices=EASINGS, default='linear')
+    parser.add_argument('--kernel', choices=KERNELS, default='exact')
+    args = parser.parse_args(argv)
+    if args.frames < 1:
+        parser.error("--frames must be at least 1")
+
+    report = run_morph(load_catalog(args.keyframes), args.frames, args.out, args.format, args.workers,
+                       args.in_flight, args.size, args.min_alpha, args.steps, args.fps, args.easing, args.kernel)
+    print(f"Rendered {len(report['frames'])} frames in {report['wall_seconds']:.2f} seconds, "
+          f"{report['frames_per_second']:.2f} frames/s and {report['samples_per_second']:.3g} samples/s, "
+          f"{report['mean_render_seconds']:.3f}s mean and {report['max_render_seconds']:.3f}s slowest frame render.")
+
+
+if __name__ == '__main__':
+    main()
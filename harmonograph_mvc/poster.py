@@ -0,0 +1,135 @@
+"""Out-of-core poster export.
+
+Renders a harmonograph far larger than fits comfortably in memory, e.g. at 32768 pixels per side:
+
+    python -m harmonograph_mvc.poster catalog.json --name spiral --size 32768 -o spiral.png
+
+Hit counts are accumulated into a memory-mapped scratch file tile by tile, and the finished image is streamed to
+the PNG row by row, so memory use depends on the chunk and tile sizes rather than the poster size.
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+
+from harmonograph_mvc.batch import load_catalog
+from harmonograph_mvc.models.harmonograph import CHUNK_SIZE, Harmonograph, HarmonographParams
+from harmonograph_mvc.models.rasterizer import (PIXEL_BATCH, alpha_lut, bresenham_segments, hits_to_intensities,
+                                                 tiles_of_segments)
+from harmonograph_mvc.utils.png import PngWriter
+
+TILE_SIZE = 2048
+PNG_ROWS = 256
+
+
+def accumulate_tiles(hits: np.ndarray, x: np.ndarray, y: np.ndarray, tile_size: int) -> int:
+    """Rasterizes the polyline through x and y into the (memory-mapped) hit counts one tile at a time, rasterizing
+    only the segments that cross each tile and dropping their pixels outside of it. The segments of a tile are
+    expanded in batches of about PIXEL_BATCH pixels like rasterize_segments does, so that memory use does not grow
+    with the length of the curve in a chunk. Returns the number of tiles touched."""
+    x = np.asarray(x).astype(np.int64)
+    y = np.asarray(y).astype(np.int64)
+    x0, y0, x1, y1 = x[:-1], y[:-1], x[1:], y[1:]
+    lengths = np.maximum(np.abs(x1 - x0), np.abs(y1 - y0))
+    segment, tile_x, tile_y = tiles_of_segments(x0, y0, x1, y1, tile_size)
+
+    tile_ids = tile_x * (hits.shape[1] // tile_size + 1) + tile_y
+    starts = np.flatnonzero(np.diff(tile_ids, prepend=-1))
+    for start, stop in zip(starts, [*starts[1:], len(segment)]):
+        selected = segment[start:stop]
+        origin_x, origin_y = tile_x[start] * tile_size, tile_y[start] * tile_size
+        tile = hits[origin_x:origin_x + tile_size, origin_y:origin_y + tile_size]
+
+        tile_lengths = lengths[selected]
+        splits = np.searchsorted(np.cumsum(tile_lengths), np.arange(PIXEL_BATCH, tile_lengths.sum(), PIXEL_BATCH))
+        for batch in np.split(selected, splits):
+            px, py = bresenham_segments(x0[batch], y0[batch], x1[batch], y1[batch])
+            px, py = px - origin_x, py - origin_y
+            inside = (px >= 0) & (px < tile.shape[0]) & (py >= 0) & (py < tile.shape[1])
+            flat = px[inside] * tile.shape[1] + py[inside]
+            if not len(flat):
+                continue
+
+            # Counting first makes every index unique, so the fancy-indexed add only touches the pages it needs
+            low = flat.min()
+            counts = np.bincount(flat - low)
+            crossed = np.flatnonzero(counts)
+            pixels = crossed + low
+            tile[pixels // tile.shape[1], pixels % tile.shape[1]] += counts[crossed].astype(hits.dtype)
+    return len(starts)
+
+
+def render_poster(params: HarmonographParams, size: int, path: str, min_alpha: int = 25, steps: int = 45,
+                  tile_size: int = TILE_SIZE, chunk_size: int = CHUNK_SIZE, scratch_path: str = None,
+                  progress=None) -> dict:
+    """Renders the harmonograph at size x size pixels to a PNG file through a memory-mapped hit buffer.
+
+    If given, progress is called with the stage name ('accumulate' or 'write'), the completed fraction of that stage
+    and the stage's throughput so far. Returns timing and throughput statistics.
+    """
+    harmonograph = Harmonograph(params)
+    scratch_path = scratch_path or path + '.hits'
+    hits = np.memmap(scratch_path, dtype=np.uint32, mode='w+', shape=(size, size))
+    stats = {'size': size, 't_samples': params.t_samples, 'tiles_touched': 0}
+    try:
+        start = time.perf_counter()
+        bounds = harmonograph.normalization_bounds(size - 1, chunk_size)
+        stats['bounds_seconds'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        chunks = -(-params.t_samples // chunk_size)
+        for i, (_, coords) in enumerate(harmonograph.iter_coords(size - 1, chunk_size, bounds=bounds)):
+            stats['tiles_touched'] += accumulate_tiles(hits, coords[0], coords[1], tile_size)
+            if progress is not None:
+                samples = min((i + 1) * chunk_size, params.t_samples)
+                progress('accumulate', (i + 1) / chunks, samples / (time.perf_counter() - start))
+        stats['accumulate_seconds'] = time.perf_counter() - start
+        stats['samples_per_second'] = params.t_samples / stats['accumulate_seconds']
+
+        start = time.perf_counter()
+        max_hits = max(int(hits[row:row + PNG_ROWS].max()) for row in range(0, size, PNG_ROWS))
+        lut = alpha_lut(min_alpha, (255 - min_alpha) / steps, max_hits)
+        with PngWriter(path, size, size) as writer:
+            for row in range(0, size, PNG_ROWS):
+                writer.write_rows(hits_to_intensities(hits[row:row + PNG_ROWS], lut))
+                if progress is not None:
+                    rows = min(row + PNG_ROWS, size)
+                    progress('write', rows / size, rows * size / (time.perf_counter() - start))
+        stats['write_seconds'] = time.perf_counter() - start
+        stats['pixels_per_second'] = size * size / stats['write_seconds']
+    finally:
+        del hits
+        os.remove(scratch_path)
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('catalog', help="JSON or CSV file of parameter sets, as for harmonograph_mvc.batch")
+    parser.add_argument('--name', help="entry of the catalog to render, defaults to the first")
+    parser.add_argument('--size', type=int, default=16384, help="poster width and height in pixels")
+    parser.add_argument('-o', '--output', default='poster.png')
+    parser.add_argument('--tile-size', type=int, default=TILE_SIZE)
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help="time samples evaluated at once")
+    parser.add_argument('--scratch', help="path of the memory-mapped hit buffer, defaults to OUTPUT.hits")
+    parser.add_argument('--min-alpha', type=int, default=25)
+    parser.add_argument('--steps', type=int, default=45)
+    args = parser.parse_args(argv)
+
+    jobs = load_catalog(args.catalog)
+    job = next(job for job in jobs if job['name'] == args.name) if args.name else jobs[0]
+    params = HarmonographParams(job['pendulums'], job['t_start'], job['t_end'], job['t_samples'])
+
+    def report(stage, fraction, throughput):
+        unit = 'samples/s' if stage == 'accumulate' else 'pixels/s'
+        print(f"\r{stage:>10}: {fraction:6.1%} {throughput / 1e6:8.2f} M{unit}", end='\n' if fraction >= 1 else '')
+
+    stats = render_poster(params, args.size, args.output, args.min_alpha, args.steps, args.tile_size,
+                          args.chunk_size, args.scratch, report)
+    print(f"Wrote {args.output}: {stats['tiles_touched']} tile passes, bounds {stats['bounds_seconds']:.2f}s, "
+          f"accumulate {stats['accumulate_seconds']:.2f}s, write {stats['write_seconds']:.2f}s.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""Headless parameter sweeps.
+
+Renders one parameter of a catalog entry swept across a range of values as a contact sheet of thumbnails:
+
+    python -m harmonograph_mvc.sweep catalog.json --name spiral --param frequency_2x --from 1 --to 3 --count 64
+
+The swept parameter is named like the CSV catalog columns, e.g. phase_1y for the phase of the first pendulum along
+y. The thumbnails are laid out row by row in order of increasing value.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from harmonograph_mvc.batch import AXES, CSV_PARAM_COLUMN, PARAM_NAMES, load_catalog
+from harmonograph_mvc.models.harmonograph import HarmonographParams
+from harmonograph_mvc.models.sweep_renderer import render_contact_sheet, sweep_params
+from harmonograph_mvc.utils.png import write_png
+
+
+def parse_cell(name: str) -> tuple:
+    """Converts a parameter name like frequency_2x to its (pendulum, axis, parameter) cell."""
+    match = CSV_PARAM_COLUMN.match(name)
+    if match is None:
+        raise ValueError(f"Unknown parameter '{name}', expected a name like frequency_2x")
+    param, pendulum, axis = match.groups()
+    return int(pendulum) - 1, AXES.index(axis), PARAM_NAMES.index(param)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('catalog', help="JSON or CSV file of parameter sets, as for harmonograph_mvc.batch")
+    parser.add_argument('--name', help="entry of the catalog to sweep, defaults to the first")
+    parser.add_argument('--param', required=True, help="parameter to sweep, e.g. frequency_2x")
+    parser.add_argument('--from', dest='start', type=float, required=True)
+    parser.add_argument('--to', dest='stop', type=float, required=True)
+    parser.add_argument('--count', type=int, default=16)
+    parser.add_argument('--thumb', type=int, default=160, help="thumbnail width and height in pixels")
+    parser.add_argument('--columns', type=int, help="thumbnails per row, defaults to a square sheet")
+    parser.add_argument('--samples', type=int, help="time samples per thumbnail, defaults to the entry's")
+    parser.add_argument('-o', '--output', default='sweep.png')
+    parser.add_argument('--min-alpha', type=int, default=25)
+    parser.add_argument('--steps', type=int, default=45)
+    args = parser.parse_args(argv)
+
+    jobs = load_catalog(args.catalog)
+    job = next(job for job in jobs if job['name'] == args.name) if args.name else jobs[0]
+    params = HarmonographParams(job['pendulums'], job['t_start'], job['t_end'], args.samples or job['t_samples'])
+
+    start = time.perf_counter()
+    params = sweep_params(params, parse_cell(args.param), np.linspace(args.start, args.stop, args.count))
+    sheet, _ = render_contact_sheet(params, args.thumb, args.columns, min_alpha=args.min_alpha, steps=args.steps)
+    write_png(args.output, sheet)
+    print(f"Wrote {args.count} thumbnails to {args.output} in {time.perf_counter() - start:.2f} seconds.")
+
+
+if __name__ == '__main__':
+    main()
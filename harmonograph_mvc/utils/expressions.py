@@ -0,0 +1,117 @@
+import ast
+from functools import lru_cache
+
+import numpy as np
+
+# Names an expression may use besides numbers and arithmetic
+CONSTANTS = {'pi': np.pi,                   # Pi
+             'e': np.e,                     # Euler's number
+             'gr': (1 + 5 ** 0.5) / 2,      # Golden ratio
+             }
+FUNCTIONS = {name: getattr(np, name) for name in ('sin', 'cos', 'tan', 'sinh', 'cosh', 'tanh', 'exp', 'log', 'sqrt')}
+FUNCTIONS['abs'] = np.abs
+TIME_VARIABLE = 't'
+
+_OPERATORS = (ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Mod, ast.Pow, ast.UAdd, ast.USub)
+_NAMESPACE = {'__builtins__': {}, **CONSTANTS, **FUNCTIONS}
+
+
+class ExpressionError(ValueError):
+    """Raised for text that is not a valid parameter expression."""
+
+
+class _FloatConstants(ast.NodeTransformer):
+    """Turns integer literals into floats, so that e.g. 9 ** 9 ** 9 overflows at once instead of computing a huge
+    integer."""
+    def visit_Constant(self, node):
+        return ast.copy_location(ast.Constant(float(node.value)), node)
+
+
+class Expression:
+    """A parameter expression compiled once from its text.
+
+    Constant expressions are evaluated when compiled and hold their value. Expressions in the time variable t are
+    evaluated as NumPy over whole arrays of time points, so that time-varying parameters need no per-sample Python.
+    """
+    def __init__(self, text: str, code, time_varying: bool):
+        self.text = text
+        self.code = code
+        self.time_varying = time_varying
+        self.value = None
+        if not time_varying:
+            self.value = float(self._evaluate({}))
+            if not np.isfinite(self.value):
+                raise ExpressionError(f"Expression '{text}' is not finite")
+
+    def __call__(self, t: np.ndarray) -> np.ndarray:
+        """Returns the float64 values of the expression at the time points t.
+
+        Raises ExpressionError if any value is complex, infinite or NaN, e.g. of 'log(t)' at t = 0, which would
+        otherwise silently leave the image blank."""
+        if not self.time_varying:
+            return np.full(np.shape(t), self.value)
+        t = np.asarray(t, dtype=np.float64)
+        values = np.broadcast_to(self._evaluate({TIME_VARIABLE: t}), np.shape(t))
+        finite = np.isfinite(values)
+        if not finite.all():
+            raise ExpressionError(f"Expression '{self.text}' is not finite at t = {t[~finite][0]:g}")
+        return values
+
+    def _evaluate(self, variables: dict) -> np.ndarray:
+        """Evaluates the code with the given variables, raising ExpressionError unless the result is real."""
+        try:
+            with np.errstate(all='ignore'):
+                values = eval(self.code, _NAMESPACE, variables)
+        except TypeError as error:
+            raise ExpressionError(f"Expression '{self.text}' cannot be evaluated") from error
+        # Python powers of negative numbers, such as (-1) ** 0.5, are complex
+        if np.iscomplexobj(values):
+            raise ExpressionError(f"Expression '{self.text}' has a complex value")
+        return np.asarray(values, dtype=np.float64)
+
+    def __reduce__(self):
+        # Code objects cannot be pickled, so expressions are sent to worker processes as text and compiled there
+        return compile_expression, (self.text,)
+
+    def __repr__(self):
+        return f"Expression({self.text!r})"
+
+
+def _validate(tree: ast.AST):
+    """Raises ExpressionError unless every node is a number, an allowed name, an allowed function of one argument or
+    arithmetic."""
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.Expression, ast.BinOp, ast.UnaryOp, ast.Load) + _OPERATORS):
+            continue
+        if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+            continue
+        if isinstance(node, ast.Name) and (node.id in CONSTANTS or node.id in FUNCTIONS or node.id == TIME_VARIABLE):
+            continue
+        if (isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in FUNCTIONS
+                and len(node.args) == 1 and not node.keywords and not isinstance(node.args[0], ast.Starred)):
+            continue
+        raise ExpressionError(f"Unsupported element '{ast.unparse(node)}'")
+
+
+@lru_cache(maxsize=1024)
+def compile_expression(text: str) -> Expression:
+    """Parses, validates and compiles the text of a parameter expression, e.g. '2 * pi' or '1 + 0.001 * t'. Results are
+    cached by text, so unchanged fields are not parsed again.
+
+    Raises ExpressionError for invalid text or a constant expression that is not finite, and ArithmeticError if a
+    constant expression fails to evaluate.
+    """
+    try:
+        tree = ast.parse(text.strip(), mode='eval')
+    except SyntaxError as error:
+        raise ExpressionError(f"Invalid expression '{text}'") from error
+    _validate(tree)
+    # Functions may only be called, not used as values
+    called = {id(node.func) for node in ast.walk(tree) if isinstance(node, ast.Call)}
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and node.id in FUNCTIONS and id(node) not in called:
+            raise ExpressionError(f"Function '{node.id}' must be called")
+
+    time_varying = any(isinstance(node, ast.Name) and node.id == TIME_VARIABLE for node in ast.walk(tree))
+    tree = ast.fix_missing_locations(_FloatConstants().visit(tree))
+    return Expression(text, compile(tree, '<expression>', 'eval'), time_varying)
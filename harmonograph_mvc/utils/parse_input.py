@@ -1,13 +1,12 @@
-import numpy as np
+import math
 from PyQt5.QtWidgets import QLineEdit
 from PyQt5.QtGui import QValidator
 import re
 
+from harmonograph_mvc.utils.expressions import CONSTANTS, FUNCTIONS, TIME_VARIABLE, ExpressionError, \
+    compile_expression
 
-ALLOWED_KEYWORDS = {'pi': 'np.pi',                      # Pi
-                    'e': 'np.e',                        # Euler's number
-                    'gr': '((1 + 5 ** 0.5) / 2)',       # Golden ratio
-                    }
+ALLOWED_KEYWORDS = (*CONSTANTS, *FUNCTIONS, TIME_VARIABLE)
 
 
 class ExpressionValidator(QValidator):
@@ -20,10 +19,10 @@ class ExpressionValidator(QValidator):
         if pos < len(string):
             return QValidator.Acceptable, string, pos
 
-        last_word = re.split('[-+*/.()\s ]', string)[-1]
+        last_word = re.split('[-+*/%.()\s ]', string)[-1]
 
         # Scenario 1: last char is arithmetic symbol, space, number or parentheses
-        if re.match('^[0-9+\-*/.()\s]*$', string[-1]) is not None:
+        if re.match('^[0-9+\-*/%.()\s]*$', string[-1]) is not None:
             return QValidator.Acceptable, string, pos
 
         # Scenario 2: last char is a letter which matches first char of any keyword
@@ -46,10 +45,12 @@ class ParseParamInput(QLineEdit):
         self.setText(str(init_value))
 
     def get_value(self):
-        out = self.text()
-        for identifier in ALLOWED_KEYWORDS.keys():
-            out = out.replace(identifier, ALLOWED_KEYWORDS[identifier])
+        """Returns the float value of a constant expression, the compiled Expression of one in t, or None if the text
+        is invalid."""
         try:
-            return float(eval(out))
-        except Exception:
+            expression = compile_expression(self.text())
+        except (ExpressionError, ArithmeticError):
             return None
+        if expression.time_varying:
+            return expression
+        return expression.value if math.isfinite(expression.value) else None
@@ -0,0 +1,148 @@
+import struct
+import zlib
+
+import numpy as np
+
+# Bytes of compressed image data collected before an IDAT chunk is written out
+IDAT_SIZE = 1 << 20
+
+COLOR_TYPES = {1: 0, 3: 2}  # channels -> PNG color type (grayscale, RGB)
+SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+
+def write_chunk(file, chunk_type: bytes, data: bytes):
+    file.write(struct.pack('>I', len(data)))
+    file.write(chunk_type)
+    file.write(data)
+    file.write(struct.pack('>I', zlib.crc32(data, zlib.crc32(chunk_type))))
+
+
+def header(width: int, height: int, channels: int) -> bytes:
+    """Returns the data of the IHDR chunk of an 8-bit image."""
+    return struct.pack('>IIBBBBB', width, height, 8, COLOR_TYPES[channels], 0, 0, 0)
+
+
+def filter_rows(rows: np.ndarray, width: int, channels: int) -> bytes:
+    """Returns the scanlines of a block of uint8 pixels as PNG image data before compression."""
+    rows = np.ascontiguousarray(rows, dtype=np.uint8).reshape(len(rows), width * channels)
+    # Every scanline starts with its filter type, 0 (none)
+    filtered = np.zeros((len(rows), rows.shape[1] + 1), dtype=np.uint8)
+    filtered[:, 1:] = rows
+    return filtered.tobytes()
+
+
+def compress_image(image: np.ndarray, level: int = 6) -> bytes:
+    """Returns the compressed image data of a grayscale or RGB uint8 array, e.g. for an ApngWriter frame. This is the
+    costly part of writing a PNG and can be done in another process."""
+    channels = image.shape[2] if image.ndim == 3 else 1
+    return zlib.compress(filter_rows(image, image.shape[1], channels), level)
+
+
+class PngWriter:
+    """Writes an 8-bit grayscale or RGB PNG row by row, so that images larger than memory can be streamed to disk."""
+    def __init__(self, path: str, width: int, height: int, channels: int = 1):
+        self.file = open(path, 'wb')
+        self.width = width
+        self.height = height
+        self.channels = channels
+        self.rows_written = 0
+        self.compressor = zlib.compressobj(6)
+        self.pending = []
+        self.pending_size = 0
+
+        self.file.write(SIGNATURE)
+        self._write_chunk(b'IHDR', header(width, height, channels))
+
+    def _write_chunk(self, chunk_type: bytes, data: bytes):
+        write_chunk(self.file, chunk_type, data)
+
+    def _queue(self, data: bytes):
+        """Collects compressed data and writes it out as IDAT chunks of about IDAT_SIZE bytes."""
+        self.pending.append(data)
+        self.pending_size += len(data)
+        if self.pending_size >= IDAT_SIZE:
+            self._write_chunk(b'IDAT', b''.join(self.pending))
+            self.pending = []
+            self.pending_size = 0
+
+    def write_rows(self, rows: np.ndarray):
+        """Appends a (rows, width) or (rows, width, channels) block of uint8 pixels to the image."""
+        self._queue(self.compressor.compress(filter_rows(rows, self.width, self.channels)))
+        self.rows_written += len(rows)
+
+    def close(self):
+        """Finishes the compressed stream and the file."""
+        if self.rows_written != self.height:
+            raise ValueError(f"PNG expects {self.height} rows but {self.rows_written} were written")
+        self._queue(self.compressor.flush())
+        self._write_chunk(b'IDAT', b''.join(self.pending))
+        self._write_chunk(b'IEND', b'')
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.file.close()
+
+
+def write_png(path: str, image: np.ndarray):
+    """Writes a (rows, columns) grayscale or (rows, columns, 3) RGB uint8 array to a PNG file."""
+    channels = image.shape[2] if image.ndim == 3 else 1
+    with PngWriter(path, image.shape[1], image.shape[0], channels) as writer:
+        writer.write_rows(image)
+
+
+class ApngWriter:
+    """Writes an animated PNG frame by frame, so that only the frame being written is held in memory.
+
+    Frames are added as compressed image data from compress_image, and must all have the image's size. Viewers
+    without APNG support show the first frame.
+    """
+    def __init__(self, path: str, width: int, height: int, frames: int, channels: int = 1, fps: float = 30.0,
+                 plays: int = 0):
+        self.file = open(path, 'wb')
+        self.width = width
+        self.height = height
+        self.frames = frames
+        self.frames_written = 0
+        self.sequence = 0
+        # Frame delays are fractions of a second, stored as a numerator and denominator of up to 16 bits
+        self.delay = (1000, int(round(fps * 1000))) if fps * 1000 < 2 ** 16 else (1, int(round(fps)))
+
+        self.file.write(SIGNATURE)
+        write_chunk(self.file, b'IHDR', header(width, height, channels))
+        write_chunk(self.file, b'acTL', struct.pack('>II', frames, plays))
+
+    def write_frame(self, data: bytes):
+        """Appends a frame given as compressed image data."""
+        if self.frames_written == self.frames:
+            raise ValueError(f"APNG expects {self.frames} frames")
+        write_chunk(self.file, b'fcTL', struct.pack('>IIIIIHHBB', self.sequence, self.width, self.height, 0, 0,
+                                                    *self.delay, 0, 0))
+        self.sequence += 1
+        # The first frame doubles as the default image, later ones carry sequence numbers
+        if self.frames_written == 0:
+            write_chunk(self.file, b'IDAT', data)
+        else:
+            write_chunk(self.file, b'fdAT', struct.pack('>I', self.sequence) + data)
+            self.sequence += 1
+        self.frames_written += 1
+
+    def close(self):
+        if self.frames_written != self.frames:
+            raise ValueError(f"APNG expects {self.frames} frames but {self.frames_written} were written")
+        write_chunk(self.file, b'IEND', b'')
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.file.close()
@@ -0,0 +1,169 @@
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+# The profiler that span and count report to, set with profiling for the current thread or task only
+_active_profiler = ContextVar('active_profiler', default=None)
+
+
+class Span:
+    """A timed stage of a profiled run, with the stages nested inside it as children."""
+    def __init__(self, name: str, parent=None, **counts):
+        self.name = name
+        self.parent = parent
+        self.counts = dict(counts)
+        self.children = []
+        self.thread = threading.get_ident()
+        self.start = time.perf_counter()
+        self.cpu_start = time.thread_time()
+        self.wall = None
+        self.cpu = None
+        self.peak_bytes = None
+        self.start_bytes = None
+        self.peak_absolute = None
+
+    def to_dict(self) -> dict:
+        return {
+            'name': self.name,
+            'wall_seconds': self.wall,
+            'cpu_seconds': self.cpu,
+            'peak_bytes': self.peak_bytes,
+            'counts': self.counts,
+            'children': [child.to_dict() for child in self.children],
+        }
+
+
+class Profiler:
+    """Records nested spans of wall time, CPU time of the running thread, peak traced allocation and counts such as
+    samples or pixels.
+
+    Spans are opened with span() on the active profiler, see profiling. The peak allocation of a span is tracked with
+    tracemalloc, which is started for the profiler's lifetime if trace_memory is set and counts the allocations of all
+    threads. A profiler may be activated in several threads one after another, but not in two at once.
+    """
+    def __init__(self, trace_memory: bool = False):
+        self.trace_memory = trace_memory
+        self.started_tracing = False
+        self.origin = time.perf_counter()
+        self.spans = []
+        self.stack = []
+
+    @contextmanager
+    def span(self, name: str, **counts):
+        """Times the enclosed block as a span nested in the currently open one, and yields it."""
+        parent = self.stack[-1] if self.stack else None
+        span = Span(name, parent, **counts)
+        (parent.children if parent else self.spans).append(span)
+        if self.trace_memory:
+            self._enter_memory(span)
+        self.stack.append(span)
+        try:
+            yield span
+        finally:
+            self.stack.pop()
+            span.wall = time.perf_counter() - span.start
+            span.cpu = time.thread_time() - span.cpu_start
+            if self.trace_memory:
+                self._exit_memory(span)
+
+    def _enter_memory(self, span: Span):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.started_tracing = True
+        current, peak = tracemalloc.get_traced_memory()
+        # The peak is reset for every span, so the parent's peak so far is carried over by hand
+        if span.parent is not None:
+            span.parent.peak_absolute = max(span.parent.peak_absolute, peak)
+        tracemalloc.reset_peak()
+        span.start_bytes = span.peak_absolute = current
+
+    def _exit_memory(self, span: Span):
+        span.peak_absolute = max(span.peak_absolute, tracemalloc.get_traced_memory()[1])
+        span.peak_bytes = span.peak_absolute - span.start_bytes
+        tracemalloc.reset_peak()
+        if span.parent is not None:
+            span.parent.peak_absolute = max(span.parent.peak_absolute, span.peak_absolute)
+        elif self.started_tracing:
+            tracemalloc.stop()
+            self.started_tracing = False
+
+    def count(self, **counts):
+        """Adds to the counts of the innermost open span."""
+        if self.stack:
+            span_counts = self.stack[-1].counts
+            for name, value in counts.items():
+                span_counts[name] = span_counts.get(name, 0) + value
+
+    def iter_spans(self, spans=None, depth: int = 0):
+        """Yields every (span, depth) in depth-first order."""
+        for span in self.spans if spans is None else spans:
+            yield span, depth
+            yield from self.iter_spans(span.children, depth + 1)
+
+    def stages(self) -> dict:
+        """Totals the wall and CPU time, calls and counts of the spans by name, for comparing runs."""
+        stages = {}
+        for span, _ in self.iter_spans():
+            stage = stages.setdefault(span.name, {'calls': 0, 'wall_seconds': 0.0, 'cpu_seconds': 0.0, 'counts': {}})
+            stage['calls'] += 1
+            stage['wall_seconds'] += span.wall or 0.0
+            stage['cpu_seconds'] += span.cpu or 0.0
+            for name, value in span.counts.items():
+                stage['counts'][name] = stage['counts'].get(name, 0) + value
+        return stages
+
+    def to_dict(self) -> dict:
+        return {'spans': [span.to_dict() for span in self.spans], 'stages': self.stages()}
+
+    def to_chrome_trace(self) -> dict:
+        """Converts the spans to complete events of the Chrome trace event format, as read by chrome://tracing and
+        Perfetto."""
+        events = [{
+            'name': span.name,
+            'ph': 'X',
+            'ts': (span.start - self.origin) * 1e6,
+            'dur': (span.wall or 0.0) * 1e6,
+            'pid': os.getpid(),
+            'tid': span.thread,
+            'args': {'cpu_seconds': span.cpu, 'peak_bytes': span.peak_bytes, **span.counts},
+        } for span, _ in self.iter_spans()]
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def save_json(self, path: str):
+        with open(path, 'w') as file:
+            json.dump(self.to_dict(), file, indent=2)
+
+    def save_chrome_trace(self, path: str):
+        with open(path, 'w') as file:
+            json.dump(self.to_chrome_trace(), file)
+
+
+@contextmanager
+def profiling(profiler: Profiler):
+    """Makes the profiler the active one of the current thread for the enclosed block."""
+    token = _active_profiler.set(profiler)
+    try:
+        yield profiler
+    finally:
+        _active_profiler.reset(token)
+
+
+def active_profiler():
+    return _active_profiler.get()
+
+
+def span(name: str, **counts):
+    """Opens a span on the active profiler, or does nothing if there is none."""
+    profiler = _active_profiler.get()
+    return nullcontext() if profiler is None else profiler.span(name, **counts)
+
+
+def count(**counts):
+    """Adds to the counts of the active profiler's innermost span, if there is one."""
+    profiler = _active_profiler.get()
+    if profiler is not None:
+        profiler.count(**counts)
@@ -0,0 +1,48 @@
+from collections import OrderedDict
+import threading
+
+import numpy as np
+
+
+class RenderCache:
+    """A least-recently-used cache of rendered hit counts, bounded by the total size of the stored arrays.
+
+    Hit counts are stored rather than images so that changing only the alpha settings is a lookup table remap of a
+    cached entry instead of a new render.
+    """
+    def __init__(self, max_bytes: int = 256 * 2 ** 20):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key, layers: int = 1):
+        """Returns the cached (layers, width, height) hit counts for the key, or None. An entry with more layers than
+        asked for also serves the request."""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or len(entry) < layers:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, hit_counts: np.ndarray):
+        """Stores hit counts under the key, evicting the least recently used entries to stay within max_bytes."""
+        with self.lock:
+            if key in self.entries:
+                self.size -= self.entries.pop(key).nbytes
+            if hit_counts.nbytes > self.max_bytes:
+                return
+            self.entries[key] = hit_counts
+            self.size += hit_counts.nbytes
+            while self.size > self.max_bytes:
+                self.size -= self.entries.popitem(last=False)[1].nbytes
+
+    def stats(self) -> str:
+        """Summarizes the cache for the status line."""
+        return (f"cache: {self.hits} hits, {self.misses} misses, {len(self.entries)} entries, "
+                f"{self.size / 2 ** 20:.0f} MB")
@@ -0,0 +1,141 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+import numpy as np
+
+# Where renders and presets are kept between sessions unless another directory is given
+DEFAULT_STORE_DIRECTORY = os.path.join(os.path.expanduser('~'), '.harmonograph')
+
+
+def narrowest(hit_counts: np.ndarray) -> np.ndarray:
+    """Returns integer hit counts in the narrowest unsigned type holding their maximum, and fractional ones as they
+    are."""
+    if hit_counts.dtype.kind == 'f' or hit_counts.size == 0:
+        return hit_counts
+    return hit_counts.astype(np.min_scalar_type(int(hit_counts.max())), copy=False)
+
+
+def atomic_write(path: str, write):
+    """Calls write with a binary file in path's directory and renames it to path once complete, so that readers
+    never see a partial file."""
+    descriptor, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(descriptor, 'wb') as file:
+            write(file)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+
+class RenderStore:
+    """A content-addressed store of rendered hit counts on disk, bounded by the total size of its files.
+
+    Entries are named by a hash of the render key and the renderer version, so renders made by an older renderer are
+    never served and are eventually evicted. Hit counts are saved as .npy files in the narrowest integer type that
+    holds them, which typically shrinks them four-fold while keeping them memory-mappable, and are memory-mapped
+    read-only when loaded. A file's modification time is its last use, so the least recently used files are evicted
+    first once the store exceeds max_bytes.
+    """
+    def __init__(self, directory: str, version: int, max_bytes: int = 1024 * 2 ** 20):
+        self.directory = directory
+        self.version = version
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, key) -> str:
+        """Returns the file of the key, a tuple of plain values such as ApplicationController.render_key."""
+        digest = hashlib.sha256(repr((self.version, key)).encode()).hexdigest()
+        return os.path.join(self.directory, f'{digest}.npy')
+
+    def get(self, key, layers: int = 1):
+        """Returns the stored (layers, width, height) hit counts of the key, memory-mapped read-only, or None. An
+        entry with more layers than asked for also serves the request."""
+        path = self.path(key)
+        with self.lock:
+            try:
+                hit_counts = np.load(path, mmap_mode='r')
+                os.utime(path)
+            except (OSError, ValueError):
+                return None
+        return hit_counts if len(hit_counts) >= layers else None
+
+    def put(self, key, hit_counts: np.ndarray):
+        """Stores hit counts under the key and evicts the least recently used files to stay within max_bytes."""
+        hit_counts = narrowest(hit_counts)
+        if hit_counts.nbytes > self.max_bytes:
+            return
+        with self.lock:
+            atomic_write(self.path(key), lambda file: np.save(file, hit_counts))
+            self.evict()
+
+    def entries(self) -> list:
+        """Returns the (modification time, size, path) of every stored file."""
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith('.npy'):
+                path = os.path.join(self.directory, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def evict(self):
+        entries = sorted(self.entries())
+        size = sum(entry[1] for entry in entries)
+        for _, file_size, path in entries:
+            if size <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            size -= file_size
+
+    def stats(self) -> str:
+        """Summarizes the store for the status line."""
+        entries = self.entries()
+        return f"store: {len(entries)} entries, {sum(entry[1] for entry in entries) / 2 ** 20:.0f} MB"
+
+
+class PresetLibrary:
+    """Named presets and the state of the last session, kept as JSON next to the render store.
+
+    A preset is a JSON-compatible dict, in practice the texts and choices of the parameter fields, so that
+    expressions are kept as written.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.presets = {}
+        self.session = None
+        try:
+            with open(path) as file:
+                data = json.load(file)
+            self.presets, self.session = data.get('presets', {}), data.get('session')
+        except (OSError, ValueError):
+            pass
+
+    def names(self) -> list:
+        return sorted(self.presets)
+
+    def save(self, name: str, preset: dict):
+        self.presets[name] = preset
+        self.write()
+
+    def delete(self, name: str):
+        if self.presets.pop(name, None) is not None:
+            self.write()
+
+    def save_session(self, preset: dict):
+        self.session = preset
+        self.write()
+
+    def write(self):
+        data = json.dumps({'presets': self.presets, 'session': self.session}, indent=2).encode()
+        atomic_write(self.path, lambda file: file.write(data))
@@ -1,21 +1,13 @@
+import functools
 import time
 
 
-def timed(func):
-    def wrapper(*args, **kwargs):
-        start = time.time()
-        func(*args, **kwargs)
-        end = time.time()
-        elapsed_time = end - start
-        return elapsed_time
-    return wrapper
-
-
 def timed_passthrough(func):
+    @functools.wraps(func)
     def wrapper(*args, **kwargs):
-        start = time.time()
+        start = time.perf_counter()
         returns = func(*args, **kwargs)
-        end = time.time()
+        end = time.perf_counter()
         elapsed_time = end - start
         return returns, elapsed_time
     return wrapper
@@ -0,0 +1,28 @@
+from PyQt5.QtCore import QRectF
+from PyQt5.QtWidgets import QGraphicsItem
+
+from harmonograph_mvc.views.qimage_conversion import to_qimage
+
+
+class AnimationItem(QGraphicsItem):
+    """Displays an intensity buffer that is drawn into while it is shown.
+
+    The QImage shares the buffer's memory, so frames need no conversion; update_region only schedules a repaint of
+    the part of the item the last frame touched, and paint copies no more than the exposed part of the image.
+    """
+    def __init__(self, intensities, parent=None):
+        super().__init__(parent)
+        self.image = to_qimage(intensities)
+        self.setFlag(QGraphicsItem.ItemUsesExtendedStyleOption)
+
+    def boundingRect(self):
+        return QRectF(self.image.rect())
+
+    def paint(self, painter, option, widget=None):
+        painter.drawImage(option.exposedRect, self.image, option.exposedRect)
+
+    def update_region(self, region):
+        """Repaints the (row_start, row_stop, column_start, column_stop) region of the intensity buffer."""
+        row_start, row_stop, column_start, column_stop = region
+        # Buffer rows are image lines, so they run along the item's y axis
+        self.update(QRectF(column_start, row_start, column_stop - column_start, row_stop - row_start))
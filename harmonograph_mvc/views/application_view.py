@@ -1,30 +1,77 @@
+import os
+import time
+
 from PyQt5.QtCore import Qt, QTimer
-from PyQt5.QtGui import QPixmap
-from PyQt5.QtWidgets import QMainWindow, QGraphicsView, QGraphicsScene, QVBoxLayout, QPushButton, QLabel, QWidget, \
-    QDesktopWidget, QHBoxLayout, QCheckBox, QGridLayout, QSpacerItem, QSizePolicy, QLineEdit, QComboBox, QStackedWidget
+from PyQt5.QtGui import QColor, QPixmap
+from PyQt5.QtWidgets import QMainWindow, QGraphicsScene, QVBoxLayout, QPushButton, QLabel, QWidget, \
+    QDesktopWidget, QHBoxLayout, QCheckBox, QGridLayout, QSpacerItem, QSizePolicy, QLineEdit, QComboBox, \
+    QStackedWidget, QTreeWidget, QTreeWidgetItem, QFileDialog
 
+from harmonograph_mvc.models.renderer import RENDERER_VERSION
 from harmonograph_mvc.utils.parse_input import ParseParamInput
+from harmonograph_mvc.utils.profiler import Profiler, profiling, span
+from harmonograph_mvc.utils.render_store import DEFAULT_STORE_DIRECTORY, PresetLibrary, RenderStore
+from harmonograph_mvc.controllers.animation_controller import AnimationController
 from harmonograph_mvc.controllers.application_controller import ApplicationController
+from harmonograph_mvc.controllers.live_controller import LiveController
+from harmonograph_mvc.views.animation_item import AnimationItem
+from harmonograph_mvc.views.generation_worker import GenerationWorker
+from harmonograph_mvc.views.qimage_conversion import to_qimage
+from harmonograph_mvc.views.zoomable_view import ZoomableGraphicsView
 
 
 class ApplicationView(QMainWindow):
-    def __init__(self):
+    def __init__(self, store_directory: str = DEFAULT_STORE_DIRECTORY):
         super().__init__()
 
-        self.controller = ApplicationController()
+        # Renders and presets persist across sessions in the store directory, if it can be created
+        try:
+            render_store = RenderStore(os.path.join(store_directory, 'renders'), RENDERER_VERSION)
+        except OSError:
+            render_store = None
+        self.presets = PresetLibrary(os.path.join(store_directory, 'presets.json'))
+        self.controller = ApplicationController(render_store=render_store)
+        self.live_controller = LiveController()
 
         self.default_min_alpha = 25
         self.default_alpha_steps = 45
+        self.default_layer_colors = 'white, #ff6040, #40a0ff'
+        self.default_workers = 1
+        self.default_animation_seconds = 10
+        self.animation_fps = 60
 
         self.images = {}
+        self.tile_renderer = None
+        self.profiler = None
+        self.worker = None
+        self.animation = None
+        self.animation_item = None
+        self.animation_timer = QTimer(self)
+        self.animation_timer.timeout.connect(self.advance_animation)
+
+        # In live mode edits are previewed once typing pauses briefly and refined at full quality once it stops
+        self.live_preview_timer = QTimer(self)
+        self.live_preview_timer.setSingleShot(True)
+        self.live_preview_timer.setInterval(50)
+        self.live_preview_timer.timeout.connect(self.render_live_preview)
+        self.live_refine_timer = QTimer(self)
+        self.live_refine_timer.setSingleShot(True)
+        self.live_refine_timer.setInterval(600)
+        self.live_refine_timer.timeout.connect(self.start_image_generation)
 
         self.setup_window()
         self.setup_layout()
         self.setup_controls()
         self.setup_pendulum_parameters_page()
         self.setup_alpha_blending_page()
+        self.setup_rendering_page()
+        self.setup_sweep_page()
+        self.setup_presets_page()
         self.setup_status()
 
+        if self.presets.session is not None:
+            self.apply_preset(self.presets.session)
+
     def setup_window(self):
         screen = QDesktopWidget().screenGeometry()
         self.setGeometry(screen)
@@ -52,6 +99,25 @@ class ApplicationView(QMainWindow):
         self.status_label = QLabel(self.controls)
         self.controls_layout.addWidget(self.status_label, alignment=Qt.AlignBottom)
 
+        # The profile of the last generation, expanded on demand; memory is only traced while it is expanded
+        self.profile_button = QPushButton('Profile', self.controls)
+        self.profile_button.setCheckable(True)
+        self.profile_button.toggled.connect(self.toggle_profile_panel)
+        self.export_json_button = QPushButton('Export JSON', self.controls)
+        self.export_json_button.clicked.connect(self.export_profile_json)
+        self.export_trace_button = QPushButton('Export Trace', self.controls)
+        self.export_trace_button.clicked.connect(self.export_profile_trace)
+        self.profile_buttons_layout = QHBoxLayout()
+        self.profile_buttons_layout.addWidget(self.profile_button)
+        self.profile_buttons_layout.addWidget(self.export_json_button)
+        self.profile_buttons_layout.addWidget(self.export_trace_button)
+        self.controls_layout.addLayout(self.profile_buttons_layout)
+
+        self.profile_tree = QTreeWidget(self.controls)
+        self.profile_tree.setHeaderLabels(['Stage', 'Wall ms', 'CPU ms', 'Peak MB', 'Counts'])
+        self.controls_layout.addWidget(self.profile_tree)
+        self.toggle_profile_panel(False)
+
     def setup_controls(self):
         self.controls = QWidget(self)
         self.controls.setFixedWidth(self.screen_width - self.image_width)
@@ -59,18 +125,30 @@ class ApplicationView(QMainWindow):
 
         self.generate_button = QPushButton('Generate', self.controls)
         self.generate_button.clicked.connect(self.start_image_generation)
-        self.controls_layout.addWidget(self.generate_button)
-
-        self.image_order = ['full', 'pendulum_1', 'pendulum_2']
+        self.cancel_button = QPushButton('Cancel', self.controls)
+        self.cancel_button.clicked.connect(self.cancel_image_generation)
+        self.cancel_button.setEnabled(False)
+        self.animate_button = QPushButton('Animate', self.controls)
+        self.animate_button.clicked.connect(self.toggle_animation)
+
+        generate_layout = QHBoxLayout()
+        generate_layout.addWidget(self.generate_button)
+        generate_layout.addWidget(self.cancel_button)
+        generate_layout.addWidget(self.animate_button)
+        self.controls_layout.addLayout(generate_layout)
+
+        self.image_order = ['full'] + [f'pendulum_{i + 1}' for i in range(self.controller.pendulums)] + ['composite']
         self.current_image_index = 0
 
         self.show_pendulum_paths = QCheckBox('Show Pendulum Paths', self)
+        self.composite_checkbox = QCheckBox('Composite', self)
         self.display_mode = 0
         self.display_mode_btn = QPushButton('Switch Display Mode', self)
         self.display_mode_btn.clicked.connect(self.switch_image)
 
         checkbox_layout = QHBoxLayout()
         checkbox_layout.addWidget(self.show_pendulum_paths)
+        checkbox_layout.addWidget(self.composite_checkbox)
         checkbox_layout.addWidget(self.display_mode_btn)
         self.controls_layout.addLayout(checkbox_layout)
 
@@ -80,6 +158,9 @@ class ApplicationView(QMainWindow):
         self.settings_combo_box = QComboBox()
         self.settings_combo_box.addItem("Pendulum Parameters")
         self.settings_combo_box.addItem("Alpha Blending")
+        self.settings_combo_box.addItem("Rendering")
+        self.settings_combo_box.addItem("Sweep")
+        self.settings_combo_box.addItem("Presets")
         self.settings_combo_box.currentIndexChanged.connect(self.switch_setting)
         self.controls_layout.addWidget(self.settings_combo_box)
 
@@ -88,7 +169,7 @@ class ApplicationView(QMainWindow):
 
         self.layout.addWidget(self.controls)
 
-        self.view = QGraphicsView(self)
+        self.view = ZoomableGraphicsView(self)
         self.layout.addWidget(self.view)
 
         self.setCentralWidget(self.widget)
@@ -116,11 +197,118 @@ class ApplicationView(QMainWindow):
         self.steps_layout.addWidget(self.steps_label)
         self.steps_layout.addWidget(self.steps_input)
 
+        # Set up 'Layer Colors', the colors of the harmonograph and of each pendulum in the composite image
+        self.layer_colors_label = QLabel('Layer Colors:')
+        self.layer_colors_input = QLineEdit(self.default_layer_colors)
+        self.layer_colors_layout = QHBoxLayout()
+        self.layer_colors_layout.addWidget(self.layer_colors_label)
+        self.layer_colors_layout.addWidget(self.layer_colors_input)
+
+        # Set up 'Mode', whether samples are connected by lines or splatted as a density field
+        self.render_mode_label = QLabel('Mode:')
+        self.render_mode_combo_box = QComboBox()
+        for label, mode in [('Lines', 'lines'), ('Density', 'density'), ('Density (Bilinear)', 'bilinear')]:
+            self.render_mode_combo_box.addItem(label, mode)
+        self.render_mode_layout = QHBoxLayout()
+        self.render_mode_layout.addWidget(self.render_mode_label)
+        self.render_mode_layout.addWidget(self.render_mode_combo_box)
+
+        self.alpha_layout.addLayout(self.render_mode_layout)
         self.alpha_layout.addLayout(self.min_alpha_layout)
         self.alpha_layout.addLayout(self.steps_layout)
+        self.alpha_layout.addLayout(self.layer_colors_layout)
 
         self.stack.addWidget(self.alpha_page)
 
+    def setup_rendering_page(self):
+        self.rendering_page = QWidget()
+        self.rendering_layout = QHBoxLayout(self.rendering_page)
+
+        # Set up 'Workers' parameter, the number of processes used to rasterize the curve
+        self.workers_label = QLabel('Workers:')
+        self.workers_input = QLineEdit(str(self.default_workers))
+        self.rendering_layout.addWidget(self.workers_label)
+        self.rendering_layout.addWidget(self.workers_input)
+
+        # Progressive rendering shows a coarse image early and refines it in place
+        self.progressive_checkbox = QCheckBox('Progressive')
+        self.rendering_layout.addWidget(self.progressive_checkbox)
+
+        # Adaptive sampling spaces the samples evenly along the curve rather than in time
+        self.adaptive_checkbox = QCheckBox('Adaptive Sampling')
+        self.rendering_layout.addWidget(self.adaptive_checkbox)
+
+        # Set up 'Kernel', how the pendulums are evaluated at evenly spaced time points
+        self.kernel_label = QLabel('Kernel:')
+        self.kernel_combo_box = QComboBox()
+        for label, kernel in [('Exact', 'exact'), ('Recurrence', 'recurrence'),
+                              ('Recurrence (float32)', 'recurrence32')]:
+            self.kernel_combo_box.addItem(label, kernel)
+        self.rendering_layout.addWidget(self.kernel_label)
+        self.rendering_layout.addWidget(self.kernel_combo_box)
+
+        # Live mode re-renders a quick preview whenever a parameter is edited
+        self.live_checkbox = QCheckBox('Live')
+        self.live_checkbox.toggled.connect(self.schedule_live_render)
+        self.rendering_layout.addWidget(self.live_checkbox)
+
+        # Set up 'Animation Seconds' parameter, how long the animation takes to trace the whole curve
+        self.animation_seconds_label = QLabel('Animation Seconds:')
+        self.animation_seconds_input = QLineEdit(str(self.default_animation_seconds))
+        self.rendering_layout.addWidget(self.animation_seconds_label)
+        self.rendering_layout.addWidget(self.animation_seconds_input)
+
+        self.stack.addWidget(self.rendering_page)
+
+    def setup_sweep_page(self):
+        self.sweep_page = QWidget()
+        self.sweep_layout = QHBoxLayout(self.sweep_page)
+
+        # Any cell of the parameter grid can be swept, labelled like its row and column
+        self.sweep_cell_combo_box = QComboBox()
+        for param, param_name in enumerate(['Amplitude', 'Dampening', 'Frequency', 'Phase']):
+            for axis, axis_name in enumerate('xyz'[:self.controller.dim]):
+                for pendulum in range(self.controller.pendulums):
+                    self.sweep_cell_combo_box.addItem(f'{param_name} {pendulum + 1} ({axis_name})',
+                                                      (pendulum, axis, param))
+        self.sweep_layout.addWidget(self.sweep_cell_combo_box)
+
+        self.sweep_inputs = {}
+        for name, default in [('From', 1.0), ('To', 2.0), ('Count', 16), ('Thumbnail', 160)]:
+            self.sweep_layout.addWidget(QLabel(f'{name}:'))
+            self.sweep_inputs[name] = QLineEdit(str(default))
+            self.sweep_layout.addWidget(self.sweep_inputs[name])
+
+        self.sweep_button = QPushButton('Sweep')
+        self.sweep_button.clicked.connect(self.start_sweep_generation)
+        self.sweep_layout.addWidget(self.sweep_button)
+
+        self.stack.addWidget(self.sweep_page)
+
+    def setup_presets_page(self):
+        self.presets_page = QWidget()
+        self.presets_layout = QHBoxLayout(self.presets_page)
+
+        # Saved presets are loaded by name; their renders come from the render store when it still holds them
+        self.preset_combo_box = QComboBox()
+        self.preset_combo_box.addItems(self.presets.names())
+        self.presets_layout.addWidget(self.preset_combo_box)
+        self.preset_load_button = QPushButton('Load')
+        self.preset_load_button.clicked.connect(self.load_preset)
+        self.presets_layout.addWidget(self.preset_load_button)
+        self.preset_delete_button = QPushButton('Delete')
+        self.preset_delete_button.clicked.connect(self.delete_preset)
+        self.presets_layout.addWidget(self.preset_delete_button)
+
+        self.presets_layout.addWidget(QLabel('Name:'))
+        self.preset_name_input = QLineEdit()
+        self.presets_layout.addWidget(self.preset_name_input)
+        self.preset_save_button = QPushButton('Save')
+        self.preset_save_button.clicked.connect(self.save_preset)
+        self.presets_layout.addWidget(self.preset_save_button)
+
+        self.stack.addWidget(self.presets_page)
+
     def setup_params(self, parent_widget):
         self.param_inputs = []
         self.t_inputs = []
@@ -128,7 +316,8 @@ class ApplicationView(QMainWindow):
         param_names = ['Amplitude', 'Dampening', 'Frequency', 'Phase']
         default_values = [1.0, 0.0005, 1.0, 0.0]
 
-        column_labels = ['Pendulum 1 (x)', 'Pendulum 2 (x)', 'Pendulum 1 (y)', 'Pendulum 2 (y)']
+        column_labels = [f'Pendulum {pendulum + 1} ({axis})' for axis in 'xyz'[:self.controller.dim]
+                         for pendulum in range(self.controller.pendulums)]
         for i, label in enumerate(column_labels):
             label_widget = QLabel(label, parent_widget)
             label_widget.setAlignment(Qt.AlignCenter)
@@ -139,7 +328,7 @@ class ApplicationView(QMainWindow):
             row_label = QLabel(param_name, parent_widget)
             row_label.setAlignment(Qt.AlignCenter)
             self.params_grid.addWidget(row_label, i + 1, 0)
-            for j in range(4):
+            for j in range(len(column_labels)):
                 param_input = ParseParamInput(parent_widget)  # Create ParseParamInput instance
                 param_input.setText(str(default_values[i]))
                 param_input.setAlignment(Qt.AlignCenter)
@@ -158,6 +347,9 @@ class ApplicationView(QMainWindow):
             t_params_layout.addWidget(t_input)
             self.t_inputs.append(t_input)
 
+        for input_widget in self.param_inputs + self.t_inputs:
+            input_widget.textChanged.connect(self.schedule_live_render)
+
         parent_layout = QVBoxLayout(parent_widget)
         parent_layout.addLayout(self.params_grid)
         parent_layout.addLayout(t_params_layout)
@@ -183,37 +375,354 @@ class ApplicationView(QMainWindow):
 
     def start_image_generation(self):
         self.reset_invalid_widget_highlighting()
-
-        self.update_status("Generating...")
-
-        # This will start the actual image generation after a very short delay, giving the GUI time to update
-        QTimer.singleShot(100, self.call_generate_image)
+        self.call_generate_image()
 
     def call_generate_image(self):
+        self.profiler = Profiler(trace_memory=self.profile_button.isChecked())
+
         # Extract the parameters from the UI
-        param_values = self.controller.get_param_values(self.param_inputs, self.t_inputs)
+        with profiling(self.profiler), span('parameter parsing', parameters=len(self.param_inputs)):
+            param_values = self.controller.get_param_values(self.param_inputs, self.t_inputs)
 
         invalid_params_exist = self.set_invalid_widget_highlighting()
 
         if invalid_params_exist:
             return
 
+        layer_colors = None
+        if self.composite_checkbox.isChecked():
+            layer_colors = self.get_layer_colors()
+            if layer_colors is None:
+                self.update_status("Invalid layer colors. Please enter color names or #rrggbb values separated "
+                                   "by commas.")
+                return
+
         # Pass the parameters to the controller
         self.controller.set_harmonograph_params(param_values)
 
-        # Trigger image generation
-        elapsed_time = self.controller.generate_image(self.image_width, self.image_height,
-                                                      self.show_pendulum_paths.isChecked(),
-                                                      int(self.min_alpha_input.text()),
-                                                      int(self.steps_input.text()))
+        try:
+            min_alpha, steps, workers = (int(self.min_alpha_input.text()), int(self.steps_input.text()),
+                                         int(self.workers_input.text()))
+        except ValueError:
+            self.update_status("Invalid rendering settings.")
+            return
+        if workers < 1:
+            self.update_status("Invalid rendering settings. At least one worker is needed.")
+            return
 
-        # After image is generated, get the images from the controller
-        self.images = self.controller.get_images()
+        generate_args = (self.image_width, self.image_height,
+                         self.show_pendulum_paths.isChecked(),
+                         min_alpha,
+                         steps,
+                         workers,
+                         self.progressive_checkbox.isChecked(),
+                         layer_colors,
+                         self.render_mode_combo_box.currentData(),
+                         self.adaptive_checkbox.isChecked(),
+                         self.kernel_combo_box.currentData())
+
+        self.start_worker(self.controller.generate_image, generate_args)
+
+    def get_layer_colors(self):
+        """Returns the (red, green, blue) layer colors entered on the Alpha Blending page, or None if any is invalid."""
+        colors = [QColor(name.strip()) for name in self.layer_colors_input.text().split(',')]
+        if not all(color.isValid() for color in colors):
+            return None
+        return [color.getRgb()[:3] for color in colors]
+
+    def start_sweep_generation(self):
+        self.reset_invalid_widget_highlighting()
+        self.profiler = Profiler(trace_memory=self.profile_button.isChecked())
+        with profiling(self.profiler), span('parameter parsing', parameters=len(self.param_inputs)):
+            param_values = self.controller.get_param_values(self.param_inputs, self.t_inputs)
+        if self.set_invalid_widget_highlighting():
+            return
+        self.controller.set_harmonograph_params(param_values)
 
-        # Then update the UI
-        self.display_image('full')
+        try:
+            generate_args = (self.sweep_cell_combo_box.currentData(),
+                             float(self.sweep_inputs['From'].text()), float(self.sweep_inputs['To'].text()),
+                             int(self.sweep_inputs['Count'].text()), int(self.sweep_inputs['Thumbnail'].text()),
+                             int(self.min_alpha_input.text()), int(self.steps_input.text()))
+        except ValueError:
+            self.update_status("Invalid sweep settings.")
+            return
+        self.start_worker(self.controller.generate_sweep, generate_args)
+
+    def start_worker(self, generate, generate_args):
+        # A generation still in flight is replaced rather than queued behind
+        self.stop_worker()
+        self.stop_animation()
+
+        # Trigger image generation on a worker thread so that the window keeps repainting and handling input
+        self.worker = GenerationWorker(generate, generate_args, self, self.profiler)
+        self.worker.progress.connect(self.report_generation_progress)
+        self.worker.preview.connect(self.show_generation_preview)
+        self.worker.completed.connect(self.finish_image_generation)
+        self.worker.failed.connect(self.fail_image_generation)
+        self.worker.finished.connect(self.worker.deleteLater)
+        self.worker.start()
+
+        self.cancel_button.setEnabled(True)
+        self.update_status("Generating...")
 
-        self.update_status(f"Image generation completed in {elapsed_time:.2f} seconds.")
+    def stop_worker(self):
+        """Interrupts the running generation, if any, and ignores anything it reports from now on."""
+        if self.worker is None:
+            return False
+
+        self.worker.progress.disconnect()
+        self.worker.preview.disconnect()
+        self.worker.completed.disconnect()
+        self.worker.failed.disconnect()
+        self.worker.requestInterruption()
+        self.worker = None
+        self.cancel_button.setEnabled(False)
+        return True
+
+    def cancel_image_generation(self):
+        if self.stop_worker():
+            self.update_status("Generation cancelled.")
+
+    def report_generation_progress(self, percent):
+        self.update_status(f"Generating... {percent}%")
+
+    def show_generation_preview(self, images):
+        self.tile_renderer = None
+        self.images = {name: to_qimage(intensities) for name, intensities in images.items()}
+        self.display_image(self.image_order[self.current_image_index])
+
+    def finish_image_generation(self, images, elapsed_time):
+        self.worker = None
+        self.cancel_button.setEnabled(False)
+        with profiling(self.profiler):
+            # The controller renders plain intensity arrays, which are only turned into QImages here
+            with span('qimage conversion', pixels=sum(intensities.size for intensities in images.values())):
+                self.images = {name: to_qimage(intensities) for name, intensities in images.items()}
+            self.tile_renderer = self.controller.get_tile_renderer()
+
+            # Then update the UI
+            with span('scene display'):
+                self.display_image('composite' if 'composite' in self.images else 'full')
+        self.show_profile()
+
+        self.update_status(f"Image generation completed in {elapsed_time:.2f} seconds, first image after "
+                           f"{self.controller.first_image_time:.2f} seconds ({self.cache_stats()}).")
+
+    def fail_image_generation(self, message):
+        self.worker = None
+        self.cancel_button.setEnabled(False)
+        self.update_status(f"Generation failed: {message}")
+
+    def schedule_live_render(self):
+        """Restarts the live mode timers, so that a burst of edits renders only once it pauses."""
+        self.live_preview_timer.stop()
+        self.live_refine_timer.stop()
+        if self.live_checkbox.isChecked():
+            self.live_preview_timer.start()
+
+    def render_live_preview(self):
+        self.reset_invalid_widget_highlighting()
+        param_values = self.controller.get_param_values(self.param_inputs, self.t_inputs)
+        if self.set_invalid_widget_highlighting():
+            return
+        try:
+            min_alpha, alpha_steps = int(self.min_alpha_input.text()), int(self.steps_input.text())
+        except ValueError:
+            self.update_status("Invalid alpha blending settings.")
+            return
+
+        # The preview replaces whatever is being rendered for the previous parameters
+        self.controller.set_harmonograph_params(param_values)
+        self.stop_worker()
+        self.stop_animation()
+
+        intensities, scale = self.live_controller.render_preview(self.controller.params, self.image_width - 50,
+                                                                 self.image_height - 50, min_alpha, alpha_steps,
+                                                                 self.kernel_combo_box.currentData())
+        pixmap = QPixmap.fromImage(to_qimage(intensities))
+        scene = QGraphicsScene()
+        scene.addPixmap(pixmap).setScale(1 / scale)
+        self.view.setScene(scene)
+        self.update_status(f"Live preview at {scale:.0%} resolution.")
+        self.live_refine_timer.start()
+
+    def toggle_animation(self):
+        if self.stop_animation():
+            self.update_status("Animation stopped.")
+            return
+
+        self.reset_invalid_widget_highlighting()
+        param_values = self.controller.get_param_values(self.param_inputs, self.t_inputs)
+        if self.set_invalid_widget_highlighting():
+            return
+
+        try:
+            min_alpha, steps, duration = (int(self.min_alpha_input.text()), int(self.steps_input.text()),
+                                          float(self.animation_seconds_input.text()))
+        except ValueError:
+            self.update_status("Invalid animation settings.")
+            return
+        if steps < 1 or not 0 < duration < float('inf'):
+            self.update_status("Invalid animation settings. Alpha steps and seconds must be positive numbers.")
+            return
+        self.controller.set_harmonograph_params(param_values)
+        self.stop_worker()
+
+        self.animation = AnimationController(self.controller.params, self.image_width - 50, self.image_height - 50,
+                                             min_alpha, steps, duration, self.animation_fps)
+        # The scene is built once; frames only repaint the regions they drew into
+        self.animation_item = AnimationItem(self.animation.intensities)
+        scene = QGraphicsScene()
+        scene.addItem(self.animation_item)
+        self.view.setScene(scene)
+
+        self.animate_button.setText('Stop')
+        self.animation.start(time.perf_counter())
+        self.animation_timer.start(int(1000 / self.animation_fps))
+
+    def advance_animation(self):
+        region = self.animation.advance(time.perf_counter())
+        if region is not None:
+            self.animation_item.update_region(region)
+
+        self.update_status(f"Animating... {self.animation.fraction:.0%} at {self.animation.fps:.1f} fps "
+                           f"({self.animation.skipped_frames} frames skipped)")
+        if self.animation.done:
+            self.stop_animation()
+
+    def stop_animation(self):
+        """Stops the running animation, if any, leaving its last frame on display."""
+        if self.animation is None:
+            return False
+
+        self.animation_timer.stop()
+        self.animation = None
+        self.animate_button.setText('Animate')
+        return True
+
+    def toggle_profile_panel(self, expanded):
+        self.profile_tree.setVisible(expanded)
+        self.export_json_button.setVisible(expanded)
+        self.export_trace_button.setVisible(expanded)
+
+    def show_profile(self):
+        """Fills the profile panel with the spans of the last generation."""
+        self.profile_tree.clear()
+        items = {}
+        for profiled_span, _ in self.profiler.iter_spans():
+            peak = '' if profiled_span.peak_bytes is None else f'{profiled_span.peak_bytes / 2 ** 20:.1f}'
+            counts = ', '.join(f'{name}={value:,}' for name, value in profiled_span.counts.items())
+            columns = [profiled_span.name, f'{profiled_span.wall * 1000:.1f}', f'{profiled_span.cpu * 1000:.1f}',
+                       peak, counts]
+            parent = items.get(id(profiled_span.parent))
+            item = QTreeWidgetItem(parent, columns) if parent else QTreeWidgetItem(self.profile_tree, columns)
+            items[id(profiled_span)] = item
+        for i in range(self.profile_tree.topLevelItemCount()):
+            self.profile_tree.topLevelItem(i).setExpanded(True)
+
+    def export_profile_json(self):
+        if self.profiler is None:
+            return
+        path, _ = QFileDialog.getSaveFileName(self, 'Export Profile', 'profile.json', 'JSON (*.json)')
+        if path:
+            self.profiler.save_json(path)
+
+    def export_profile_trace(self):
+        if self.profiler is None:
+            return
+        path, _ = QFileDialog.getSaveFileName(self, 'Export Chrome Trace', 'trace.json', 'JSON (*.json)')
+        if path:
+            self.profiler.save_chrome_trace(path)
+
+    def cache_stats(self) -> str:
+        stats = self.controller.render_cache.stats()
+        if self.controller.render_store is not None:
+            stats += f", {self.controller.render_store.stats()}"
+        return stats
+
+    def get_preset(self) -> dict:
+        """Returns the parameter fields and render settings as a preset, fields as their text."""
+        return {
+            'params': [param_input.text() for param_input in self.param_inputs],
+            't_params': [t_input.text() for t_input in self.t_inputs],
+            'min_alpha': self.min_alpha_input.text(),
+            'steps': self.steps_input.text(),
+            'layer_colors': self.layer_colors_input.text(),
+            'render_mode': self.render_mode_combo_box.currentData(),
+            'kernel': self.kernel_combo_box.currentData(),
+            'adaptive': self.adaptive_checkbox.isChecked(),
+            'show_pendulum_paths': self.show_pendulum_paths.isChecked(),
+            'composite': self.composite_checkbox.isChecked(),
+        }
+
+    def apply_preset(self, preset: dict):
+        """Fills the fields from a preset. Presets saved with a different number of pendulums or axes only set the
+        render settings."""
+        if len(preset.get('params', [])) == len(self.param_inputs):
+            for param_input, text in zip(self.param_inputs, preset['params']):
+                param_input.setText(text)
+        if len(preset.get('t_params', [])) == len(self.t_inputs):
+            for t_input, text in zip(self.t_inputs, preset['t_params']):
+                t_input.setText(text)
+        for field, line_edit in [('min_alpha', self.min_alpha_input), ('steps', self.steps_input),
+                                 ('layer_colors', self.layer_colors_input)]:
+            if field in preset:
+                line_edit.setText(preset[field])
+        for field, combo_box in [('render_mode', self.render_mode_combo_box), ('kernel', self.kernel_combo_box)]:
+            index = combo_box.findData(preset.get(field))
+            if index >= 0:
+                combo_box.setCurrentIndex(index)
+        for field, checkbox in [('adaptive', self.adaptive_checkbox), ('show_pendulum_paths', self.show_pendulum_paths),
+                                ('composite', self.composite_checkbox)]:
+            checkbox.setChecked(bool(preset.get(field, checkbox.isChecked())))
+
+    def save_preset(self):
+        name = self.preset_name_input.text().strip() or self.preset_combo_box.currentText()
+        if not name:
+            self.update_status("Enter a name for the preset.")
+            return
+        try:
+            self.presets.save(name, self.get_preset())
+        except OSError as error:
+            self.update_status(f"Could not save the preset: {error}")
+            return
+        self.preset_combo_box.clear()
+        self.preset_combo_box.addItems(self.presets.names())
+        self.preset_combo_box.setCurrentText(name)
+        self.update_status(f"Saved preset '{name}'.")
+
+    def load_preset(self):
+        """Applies the selected preset and generates its image, which is a lookup if it was rendered before."""
+        preset = self.presets.presets.get(self.preset_combo_box.currentText())
+        if preset is not None:
+            self.apply_preset(preset)
+            self.start_image_generation()
+
+    def delete_preset(self):
+        name = self.preset_combo_box.currentText()
+        if not name:
+            return
+        try:
+            self.presets.delete(name)
+        except OSError as error:
+            self.update_status(f"Could not delete the preset: {error}")
+            return
+        self.preset_combo_box.removeItem(self.preset_combo_box.currentIndex())
+        self.update_status(f"Deleted preset '{name}'.")
+
+    def closeEvent(self, event):
+        # Let running generations notice the interruption before the window and its threads are destroyed
+        for worker in self.findChildren(GenerationWorker):
+            worker.requestInterruption()
+            worker.wait()
+        self.view.stop_tile_worker()
+        # The next session starts where this one ended
+        try:
+            self.presets.save_session(self.get_preset())
+        except OSError:
+            pass
+        super().closeEvent(event)
 
     def display_image(self, name):
         """Displays the image with the given name."""
@@ -223,6 +732,9 @@ class ApplicationView(QMainWindow):
             scene = QGraphicsScene()
             scene.addPixmap(QPixmap.fromImage(image))
             self.view.setScene(scene)
+            # Zooming into the harmonograph adds detail; the other images are only magnified
+            if name == 'full':
+                self.view.set_tile_renderer(self.tile_renderer)
         else:
             self.update_status(f"Image '{name}' not found.")
 
@@ -0,0 +1,51 @@
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from harmonograph_mvc.utils.profiler import profiling, span
+
+
+class GenerationCancelled(Exception):
+    """Raised from the progress callback to abort a generation that is no longer wanted."""
+
+
+class GenerationWorker(QThread):
+    """Runs a generation such as ApplicationController.generate_image off the GUI thread, reporting progress and
+    supporting cancellation through QThread.requestInterruption.
+
+    The generate function takes the generate_args and progress and preview keyword arguments, and returns the images
+    by name and the elapsed time. If a profiler is given, it is active in the worker thread during the generation.
+    """
+    progress = pyqtSignal(int)
+    preview = pyqtSignal(object)
+    completed = pyqtSignal(object, float)
+    failed = pyqtSignal(str)
+
+    def __init__(self, generate, generate_args, parent=None, profiler=None):
+        super().__init__(parent)
+        self.generate = generate
+        self.generate_args = generate_args
+        self.profiler = profiler
+
+    def run(self):
+        try:
+            with profiling(self.profiler), span(self.generate.__name__):
+                images, elapsed_time = self.generate(*self.generate_args, progress=self.report_progress,
+                                                     preview=self.report_preview)
+        except GenerationCancelled:
+            return
+        except Exception as error:
+            self.failed.emit(str(error))
+            return
+
+        if not self.isInterruptionRequested():
+            self.completed.emit(images, elapsed_time)
+
+    def report_progress(self, fraction):
+        """Forwards progress to the GUI and aborts the generation once an interruption was requested."""
+        if self.isInterruptionRequested():
+            raise GenerationCancelled()
+        self.progress.emit(int(fraction * 100))
+
+    def report_preview(self, images):
+        """Forwards partial images of a progressive generation to the GUI."""
+        if not self.isInterruptionRequested():
+            self.preview.emit(images)
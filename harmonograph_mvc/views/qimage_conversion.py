@@ -0,0 +1,17 @@
+from PyQt5.QtGui import QImage
+import numpy as np
+
+
+def to_qimage(intensities: np.ndarray) -> QImage:
+    """Wraps a (rows, columns) uint8 intensity array or a (rows, columns, 3) uint8 RGB array from the renderer in a
+    Format_Grayscale8 or Format_RGB888 QImage without copying.
+
+    The image shares the array's memory, so the array is kept alive as an attribute of the image for as long as the
+    image is referenced.
+    """
+    intensities = np.ascontiguousarray(intensities, dtype=np.uint8)
+    height, width = intensities.shape[:2]
+    image_format = QImage.Format_RGB888 if intensities.ndim == 3 else QImage.Format_Grayscale8
+    image = QImage(intensities.data, width, height, intensities.strides[0], image_format)
+    image.ndarray = intensities
+    return image
@@ -0,0 +1,57 @@
+import threading
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+
+class TileWorker(QThread):
+    """Renders the tiles of a TileRenderer off the GUI thread.
+
+    The worker owns the renderer it is given: it builds the renderer's segment index right away and then renders the
+    requested tiles, most recently requested first, emitting every finished tile with its renderer and (zoom, row,
+    column) key. A new request replaces the tiles still pending, so that zooming or panning on never waits for tiles
+    that have left the view.
+    """
+    tile_ready = pyqtSignal(object, object, object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.condition = threading.Condition()
+        self.tile_renderer = None
+        self.pending = []
+        self.stopped = False
+
+    def set_tile_renderer(self, tile_renderer):
+        """Switches to another TileRenderer, or to None, dropping the pending tiles of the previous one."""
+        with self.condition:
+            self.tile_renderer = tile_renderer
+            self.pending = []
+            self.condition.notify()
+
+    def request(self, keys):
+        """Replaces the pending tiles with the (zoom, row, column) tiles of the keys."""
+        with self.condition:
+            self.pending = list(keys)
+            self.condition.notify()
+
+    def stop(self):
+        """Stops the worker once the tile or index it is working on is done, and waits for it."""
+        with self.condition:
+            self.stopped = True
+            self.condition.notify()
+        self.wait()
+
+    def run(self):
+        while True:
+            with self.condition:
+                while not self.stopped and not self.pending and (self.tile_renderer is None
+                                                                 or self.tile_renderer.index is not None):
+                    self.condition.wait()
+                if self.stopped:
+                    return
+                tile_renderer = self.tile_renderer
+                key = self.pending.pop() if self.pending else None
+
+            if key is None:
+                tile_renderer.build_index()
+            else:
+                self.tile_ready.emit(tile_renderer, key, tile_renderer.render_tile(*key))
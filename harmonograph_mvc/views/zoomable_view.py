@@ -0,0 +1,91 @@
+import math
+
+from PyQt5.QtCore import QTimer
+from PyQt5.QtGui import QPixmap
+from PyQt5.QtWidgets import QGraphicsView
+
+from harmonograph_mvc.views.qimage_conversion import to_qimage
+from harmonograph_mvc.views.tile_worker import TileWorker
+
+MAX_ZOOM = 64
+
+
+class ZoomableGraphicsView(QGraphicsView):
+    """A graphics view that zooms with the mouse wheel and pans by dragging.
+
+    With a TileRenderer set, the visible region is re-rasterized at the zoom level, the next power of two of the view's
+    scale, as tiles laid over the scene's image, so that zooming in adds detail instead of magnifying pixels. Tiles
+    are rendered by a TileWorker and added to the scene as they arrive, so the view stays responsive meanwhile.
+    """
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setDragMode(QGraphicsView.ScrollHandDrag)
+        self.setTransformationAnchor(QGraphicsView.AnchorUnderMouse)
+        self.tile_renderer = None
+        self.tile_items = {}
+        self.visible_tiles = set()
+        self.tile_worker = TileWorker(self)
+        self.tile_worker.tile_ready.connect(self.show_tile)
+        self.tile_worker.start()
+
+        # Tiles are brought up to date once zooming or panning pauses, not for every intermediate position
+        self.tile_timer = QTimer(self)
+        self.tile_timer.setSingleShot(True)
+        self.tile_timer.setInterval(30)
+        self.tile_timer.timeout.connect(self.update_tiles)
+        # The scroll value must not reach QTimer.start, which would take it as the interval
+        self.horizontalScrollBar().valueChanged.connect(lambda: self.tile_timer.start())
+        self.verticalScrollBar().valueChanged.connect(lambda: self.tile_timer.start())
+
+    def setScene(self, scene):
+        # Tiles belong to the previous scene and renderer
+        self.set_tile_renderer(None)
+        self.tile_items = {}
+        super().setScene(scene)
+
+    def set_tile_renderer(self, tile_renderer):
+        """Sets the TileRenderer of the image in the current scene, or None to only magnify it."""
+        self.tile_renderer = tile_renderer
+        self.visible_tiles = set()
+        self.tile_worker.set_tile_renderer(tile_renderer)
+        if tile_renderer is not None:
+            self.tile_timer.start()
+
+    def stop_tile_worker(self):
+        self.tile_worker.stop()
+
+    def wheelEvent(self, event):
+        factor = 1.25 if event.angleDelta().y() > 0 else 1 / 1.25
+        if self.transform().m11() * factor <= MAX_ZOOM:
+            self.scale(factor, factor)
+            self.tile_timer.start()
+
+    def update_tiles(self):
+        """Requests the tiles of the visible region at the current zoom level from the worker and removes all others
+        from the scene. Tiles scrolled back into view come from the renderer's cache."""
+        if self.tile_renderer is None or self.scene() is None:
+            return
+        scale = self.transform().m11()
+        zoom = 2 ** math.ceil(math.log2(scale)) if scale > 1 else 1
+
+        # Scene x and y run along the image's columns and rows, which are the renderer's y and x
+        visible = self.mapToScene(self.viewport().rect()).boundingRect()
+        tiles = set()
+        if zoom > 1:
+            tiles = {(zoom, row, column) for row, column in self.tile_renderer.tiles(
+                zoom, visible.top(), visible.bottom(), visible.left(), visible.right())}
+        for key in [key for key in self.tile_items if key not in tiles]:
+            self.scene().removeItem(self.tile_items.pop(key))
+        self.visible_tiles = tiles
+        self.tile_worker.request(tiles - self.tile_items.keys())
+
+    def show_tile(self, tile_renderer, key, intensities):
+        """Adds a tile finished by the worker to the scene, unless it is no longer wanted."""
+        if tile_renderer is not self.tile_renderer or key not in self.visible_tiles or key in self.tile_items:
+            return
+        zoom, row, column = key
+        tile_scale = self.tile_renderer.tile_size / zoom
+        item = self.scene().addPixmap(QPixmap.fromImage(to_qimage(intensities)))
+        item.setScale(1 / zoom)
+        item.setPos(column * tile_scale, row * tile_scale)
+        self.tile_items[key] = item
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from harmonograph_mvc.benchmarks.common import CASES
+from harmonograph_mvc.models.harmonograph import Harmonograph, HarmonographParams
+from harmonograph_mvc.models.renderer import ImageBlender
+
+SIZE = 300
+T_SAMPLES = 200_000
+REFERENCE_SAMPLES = 3_200_000
+SPACING = 0.5
+# Fraction by which the adaptive image may differ more from the reference than the uniform one
+TOLERANCE = 0.1
+
+
+def mean_difference(params: HarmonographParams, reference: np.ndarray) -> float:
+    """Returns the mean absolute intensity difference of the rendered parameters from the reference image."""
+    blender = ImageBlender(SIZE, SIZE, 25, 45)
+    blender.accumulate_harmonograph(Harmonograph(params), SIZE - 1)
+    return float(np.abs(blender.get_image().astype(np.int16) - reference).mean())
+
+
+@pytest.fixture(scope='module')
+def case(request):
+    """The pendulums of the case, its densely sampled reference image and its adaptive sample times."""
+    pendulums = CASES[request.param]
+    blender = ImageBlender(SIZE, SIZE, 25, 45)
+    blender.accumulate_harmonograph(Harmonograph(HarmonographParams(pendulums, 0, 2000, REFERENCE_SAMPLES)), SIZE - 1)
+    times = Harmonograph(HarmonographParams(pendulums, 0, 2000, T_SAMPLES)).arc_length_times(SIZE - 1, SPACING)
+    return pendulums, blender.get_image(), times
+
+
+@pytest.mark.parametrize('case', ['lissajous', 'spiral'], indirect=True)
+def test_adaptive_is_closer_than_uniform_with_as_many_samples(case):
+    pendulums, reference, times = case
+    assert len(times) <= T_SAMPLES
+    adaptive = mean_difference(HarmonographParams(pendulums, 0, 2000, T_SAMPLES, times), reference)
+    uniform = mean_difference(HarmonographParams(pendulums, 0, 2000, len(times)), reference)
+    assert adaptive < uniform
+
+
+# The spiral slows down as it decays, where uniform samples crowd together
+@pytest.mark.parametrize('case', ['spiral'], indirect=True)
+def test_adaptive_needs_fewer_samples_than_uniform(case):
+    pendulums, reference, times = case
+    adaptive = mean_difference(HarmonographParams(pendulums, 0, 2000, T_SAMPLES, times), reference)
+    uniform = mean_difference(HarmonographParams(pendulums, 0, 2000, T_SAMPLES), reference)
+    assert len(times) < T_SAMPLES / 2
+    assert adaptive <= uniform * (1 + TOLERANCE)
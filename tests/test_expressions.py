@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+from harmonograph_mvc.models.harmonograph import Harmonograph, HarmonographParams
+from harmonograph_mvc.utils.expressions import ExpressionError, compile_expression
+
+PENDULUMS = [[[1.0, 0.001, 2.0, 0.0], [1.0, 0.001, 3.0, 1.5]]]
+
+
+def test_time_varying_expression_is_evaluated_over_arrays():
+    t = np.linspace(0, 10, 11)
+    np.testing.assert_allclose(compile_expression('1 + 0.5 * t')(t), 1 + 0.5 * t)
+    np.testing.assert_allclose(compile_expression('2 * pi')(t), np.full(11, 2 * np.pi))
+
+
+@pytest.mark.parametrize('text', ['1/t', 'log(t)', 'sqrt(t - 5)', 'exp(t)'])
+def test_values_that_are_not_finite_raise(text):
+    with pytest.raises(ExpressionError, match='not finite'):
+        compile_expression(text)(np.linspace(0, 1000, 101))
+
+
+def test_constant_that_is_not_finite_raises():
+    with pytest.raises(ExpressionError):
+        compile_expression('exp(1000)')
+
+
+def test_generation_reports_values_that_are_not_finite():
+    params = HarmonographParams(PENDULUMS, 0, 100, 1000, expressions={(0, 0, 0): compile_expression('log(t)')})
+    with pytest.raises(ExpressionError, match="'log\\(t\\)'"):
+        Harmonograph(params).get_coords(99)
+
+
+@pytest.mark.parametrize('text', ['(-1) ** 0.5', '(-8) ** (1 / 3)'])
+def test_constant_with_a_complex_value_raises(text):
+    with pytest.raises(ExpressionError, match='complex'):
+        compile_expression(text)
+
+
+def test_time_varying_expression_with_a_complex_value_raises():
+    with pytest.raises(ExpressionError, match='complex'):
+        compile_expression('t + (-1) ** 0.5')(np.linspace(0, 1, 11))
@@ -0,0 +1,55 @@
+import pytest
+
+from harmonograph_mvc.benchmarks.common import CASES
+from harmonograph_mvc.controllers import live_controller
+from harmonograph_mvc.controllers.live_controller import LiveController
+from harmonograph_mvc.models.harmonograph import HarmonographParams
+from harmonograph_mvc.models.renderer import ImageBlender
+
+# Work units, samples evaluated plus pixels drawn, per second of the simulated machine
+RATE = 20e6
+
+
+class Clock:
+    """Stands in for the time module, advancing only as the previews render."""
+    def __init__(self):
+        self.now = 0.0
+        self.frames = []
+
+    def perf_counter(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Makes every preview take the time its samples and drawn pixels cost at RATE, so that planning is tested with
+    the pixel counts of real curves but without timing noise."""
+    clock = Clock()
+
+    class TimedBlender(ImageBlender):
+        def accumulate_harmonograph(self, harmonograph, size, *args, **kwargs):
+            super().accumulate_harmonograph(harmonograph, size, *args, **kwargs)
+            seconds = (harmonograph.t_samples + int(self.hits[0].sum(dtype='int64'))) / RATE
+            clock.now += seconds
+            clock.frames.append(seconds)
+
+    monkeypatch.setattr(live_controller, 'time', clock)
+    monkeypatch.setattr(live_controller, 'ImageBlender', TimedBlender)
+    return clock
+
+
+@pytest.mark.parametrize('case', ['lissajous', 'spiral', 'fast'])
+def test_previews_converge_within_the_budget(clock, case):
+    controller = LiveController()
+    params = HarmonographParams(CASES[case], 0, 2000, 1_000_000)
+    plans = []
+    for _ in range(25):
+        plans.append(controller.plan(params.t_samples))
+        controller.render_preview(params, 1000, 1000, 25, 45)
+
+    # Sample counts may still creep up while the frames stay on budget, as more samples of a curve whose pixels are
+    # all drawn cost little
+    assert len({scale for _, scale in plans[-5:]}) == 1
+    frames = clock.frames[-5:]
+    assert max(frames) <= 1.05 * controller.frame_budget
+    assert max(frames) - min(frames) <= 0.05 * controller.frame_budget
@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+
+from harmonograph_mvc.models.harmonograph import Harmonograph
+from harmonograph_mvc.morph import frame_params, run_morph
+
+KEYFRAMES = [
+    {'pendulums': [[[1.0, 0.001, 2.0, 0.0], [1.0, 0.001, 3.0, 1.5]]], 't_start': 0, 't_end': 100, 't_samples': 20000},
+    {'pendulums': [[[1.0, 0.001, 2.1, 0.5], [1.0, 0.001, 3.0, 1.5]]], 't_start': 1, 't_end': 101, 't_samples': 20000},
+]
+
+
+def test_interpolated_times_are_not_truncated():
+    params = list(frame_params(KEYFRAMES, 5))
+    np.testing.assert_allclose([p.t_start for p in params], [0, 0.25, 0.5, 0.75, 1])
+    np.testing.assert_allclose([p.t_end for p in params], [100, 100.25, 100.5, 100.75, 101])
+
+
+@pytest.mark.parametrize('kernel', ['recurrence', 'recurrence32'])
+def test_recurrence_kernels_follow_fractional_times(kernel):
+    params = list(frame_params(KEYFRAMES, 5))[1]
+    exact = Harmonograph(params).get_coords(499)
+    assert np.abs(Harmonograph(params, kernel).get_coords(499) - exact).max() < 0.01
+
+
+def test_empty_clip_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        run_morph(KEYFRAMES, 0, str(tmp_path / 'morph'))
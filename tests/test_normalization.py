@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+
+from harmonograph_mvc.benchmarks.common import CASES
+from harmonograph_mvc.models.harmonograph import Harmonograph, HarmonographParams
+
+SIZE = 999
+
+
+def streamed(harmonograph: Harmonograph) -> tuple[np.ndarray, np.ndarray]:
+    """Joins the pendulum coordinates and coordinates that iter_coords streams with the estimated bounds."""
+    chunks = list(harmonograph.iter_coords(SIZE, 10_000))
+    return tuple(np.concatenate([chunks[0][i]] + [chunk[i][..., 1:] for chunk in chunks[1:]], axis=-1)
+                 for i in range(2))
+
+
+@pytest.mark.parametrize('case', ['lissajous', 'spiral', 'fast'])
+def test_estimated_bounds_fill_the_image(case):
+    pendulum_coords, coords = streamed(Harmonograph(HarmonographParams(CASES[case], 0, 2000, 400_001)))
+    for layer in [*pendulum_coords, coords]:
+        assert layer.min() >= 0 and layer.max() <= SIZE
+        # The estimate misses no more than about 0.1% of the extent, and never draws past it
+        assert layer.min() <= 0.002 * SIZE and layer.max() >= 0.998 * SIZE
+
+
+def test_bounds_are_exact_with_few_samples():
+    harmonograph = Harmonograph(HarmonographParams(CASES['fast'], 0, 2000, 5000))
+    pendulum_coords, coords = harmonograph.evaluate(SIZE)
+    streamed_pendulum_coords, streamed_coords = streamed(harmonograph)
+    np.testing.assert_allclose(streamed_pendulum_coords, pendulum_coords)
+    np.testing.assert_allclose(streamed_coords, coords)
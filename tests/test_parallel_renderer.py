@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+from harmonograph_mvc.benchmarks.common import CASES
+from harmonograph_mvc.models.harmonograph import Harmonograph, HarmonographParams
+from harmonograph_mvc.models.parallel_renderer import chunk_bounds, shutdown_pools
+from harmonograph_mvc.models.renderer import ImageBlender
+
+SIZE = 200
+
+
+@pytest.fixture(scope='module', autouse=True)
+def pools():
+    yield
+    shutdown_pools()
+
+
+def hit_counts(harmonograph: Harmonograph, workers: int, layers: int, chunk_size: int) -> np.ndarray:
+    blender = ImageBlender(SIZE, SIZE, workers=workers, layers=layers)
+    blender.accumulate_harmonograph(harmonograph, SIZE - 1, chunk_size=chunk_size)
+    return blender.hits
+
+
+def test_chunk_bounds_cover_every_segment_once():
+    for segments, chunks in [(10, 3), (7, 7), (2, 5), (100_002, 4)]:
+        bounds = chunk_bounds(segments, chunks)
+        assert bounds[0][0] == 0 and bounds[-1][1] == segments
+        assert all(stop == start for (_, stop), (start, _) in zip(bounds, bounds[1:]))
+
+
+# Sample counts that do not split evenly among the workers, with chunks of several sizes per worker
+@pytest.mark.parametrize('t_samples', [50_001, 100_003])
+@pytest.mark.parametrize('layers', [1, 3])
+def test_parallel_matches_serial(t_samples, layers):
+    harmonograph = Harmonograph(HarmonographParams(CASES['lissajous'], 0, 500, t_samples))
+    serial = hit_counts(harmonograph, 1, layers, 8191)
+    assert serial.sum() > 0
+    for workers in (2, 3):
+        np.testing.assert_array_equal(hit_counts(harmonograph, workers, layers, 8191), serial)
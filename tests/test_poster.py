@@ -0,0 +1,42 @@
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from harmonograph_mvc import poster
+from harmonograph_mvc.models.rasterizer import PIXEL_BATCH, rasterize_polyline
+from harmonograph_mvc.poster import accumulate_tiles
+
+SIZE = 1000
+
+
+def random_polyline(seed: int, samples: int) -> tuple[np.ndarray, np.ndarray]:
+    """Long random jumps across the whole image, so that most segments cross several tiles."""
+    rng = np.random.default_rng(seed)
+    return rng.uniform(0, SIZE - 1, samples), rng.uniform(0, SIZE - 1, samples)
+
+
+@pytest.mark.parametrize('pixel_batch', [PIXEL_BATCH, 5000])
+@pytest.mark.parametrize('tile_size', [128, 333, SIZE])
+def test_tiles_match_the_full_rasterizer(monkeypatch, pixel_batch, tile_size):
+    monkeypatch.setattr(poster, 'PIXEL_BATCH', pixel_batch)
+    x, y = random_polyline(0, 300)
+    expected = np.zeros((SIZE, SIZE), dtype=np.uint32)
+    rasterize_polyline(expected, x, y)
+    hits = np.zeros((SIZE, SIZE), dtype=np.uint32)
+    accumulate_tiles(hits, x, y, tile_size)
+    np.testing.assert_array_equal(hits, expected)
+
+
+def test_pixel_expansion_is_batched():
+    # About 5 million pixels, each expanded into several int64 index arrays if done at once
+    x, y = random_polyline(1, 15_000)
+    hits = np.zeros((SIZE, SIZE), dtype=np.uint32)
+    tracemalloc.start()
+    try:
+        accumulate_tiles(hits, x, y, SIZE)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    # The expansion of a batch takes a dozen or so int64 arrays of PIXEL_BATCH pixels
+    assert peak < 24 * 8 * PIXEL_BATCH
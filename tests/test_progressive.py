@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+from harmonograph_mvc.benchmarks.common import CASES
+from harmonograph_mvc.models.harmonograph import Harmonograph, HarmonographParams
+from harmonograph_mvc.models.renderer import ImageBlender
+
+SIZE = 300
+
+
+def progressive_hits(harmonograph: Harmonograph, stride: int, layers: int = 1) -> list:
+    """The hit counts after every progressive pass."""
+    blender = ImageBlender(SIZE, SIZE, layers=layers)
+    return [blender.hits.copy() for _ in blender.iter_progressive(harmonograph, SIZE - 1, stride, chunk_size=4096)]
+
+
+@pytest.mark.parametrize('stride', [1, 4, 16])
+@pytest.mark.parametrize('layers', [1, 3])
+def test_last_pass_equals_a_streamed_render(stride, layers):
+    harmonograph = Harmonograph(HarmonographParams(CASES['lissajous'], 0, 500, 50_001))
+    full = ImageBlender(SIZE, SIZE, layers=layers)
+    full.accumulate_harmonograph(harmonograph, SIZE - 1, chunk_size=1000)
+
+    passes = progressive_hits(harmonograph, stride, layers)
+    assert len(passes) == stride.bit_length()
+    # Every pass only adds the segments it draws to those drawn before
+    for earlier, later in zip(passes, passes[1:]):
+        assert (later >= earlier).all() and (later > earlier).any()
+    np.testing.assert_array_equal(passes[-1], full.hits)
+
+
+def test_last_pass_equals_a_full_render():
+    # With no more samples than the bounds are estimated from, the streamed bounds equal those of the full array
+    harmonograph = Harmonograph(HarmonographParams(CASES['lissajous'], 0, 500, 10_001))
+    assert harmonograph.bounds_samples() == harmonograph.t_samples
+    full = ImageBlender(SIZE, SIZE)
+    full.blend(*harmonograph.get_coords(SIZE - 1))
+    np.testing.assert_array_equal(progressive_hits(harmonograph, 16)[-1], full.hits)
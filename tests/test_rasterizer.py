@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from harmonograph_mvc.models.rasterizer import bresenham_segments
+from harmonograph_mvc.models.renderer import ImageBlender
+
+
+def scalar_pixels(x0, y0, x1, y1) -> list:
+    """The pixels the per-pixel renderer drew for each segment, which excludes the segment's last point."""
+    pixels = []
+    for segment in zip(x0.tolist(), y0.tolist(), x1.tolist(), y1.tolist()):
+        pixels.extend(list(ImageBlender.bresenham(*segment))[:-1])
+    return pixels
+
+
+def per_pixel_intensities(x, y, width, height, min_alpha, steps) -> np.ndarray:
+    """The intensities of the per-pixel renderer: the first hit of a pixel sets min_alpha and every further hit adds
+    the alpha increment up to 255."""
+    alpha_increment = (255 - min_alpha) / steps
+    intensities = np.zeros((width, height))
+    crossed = np.zeros((width, height), dtype=bool)
+    for i in range(1, len(x)):
+        for px, py in list(ImageBlender.bresenham(int(x[i - 1]), int(y[i - 1]), int(x[i]), int(y[i])))[:-1]:
+            if not crossed[px, py]:
+                intensities[px, py] = min_alpha
+                crossed[px, py] = True
+            else:
+                intensities[px, py] = min(255, intensities[px, py] + alpha_increment)
+    return intensities.astype(np.uint8)
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_random_segments_match_scalar_bresenham(seed):
+    rng = np.random.default_rng(seed)
+    x0, y0, x1, y1 = rng.integers(-50, 50, (4, 500))
+    px, py = bresenham_segments(x0, y0, x1, y1)
+    assert list(zip(px.tolist(), py.tolist())) == scalar_pixels(x0, y0, x1, y1)
+
+
+@pytest.mark.parametrize('segment', [
+    (3, 4, 3, 4),       # zero length
+    (0, 0, 9, 0),       # horizontal
+    (9, 2, 0, 2),
+    (5, 0, 5, 9),       # vertical
+    (5, 9, 5, 0),
+    (0, 0, 7, 7),       # diagonal
+    (7, 0, 0, 7),
+    (0, 7, 7, 0),
+    (7, 7, 0, 0),
+    (0, 0, 8, 3),       # shallow and steep, with ties of the error term
+    (0, 0, 3, 8),
+    (8, 3, 0, 0),
+])
+def test_special_segments_match_scalar_bresenham(segment):
+    x0, y0, x1, y1 = (np.array([value]) for value in segment)
+    px, py = bresenham_segments(x0, y0, x1, y1)
+    assert list(zip(px.tolist(), py.tolist())) == scalar_pixels(x0, y0, x1, y1)
+
+
+@pytest.mark.parametrize('min_alpha, steps', [(25, 10), (0, 3), (100, 45)])
+def test_render_matches_per_pixel_rule(min_alpha, steps):
+    rng = np.random.default_rng(min_alpha)
+    # A random walk revisits pixels, so that the saturation of the alpha increments is exercised
+    x = np.clip(np.cumsum(rng.integers(-6, 7, 3000)) + 30, 0, 59)
+    y = np.clip(np.cumsum(rng.integers(-6, 7, 3000)) + 20, 0, 39)
+    blender = ImageBlender(60, 40, min_alpha, steps)
+    np.testing.assert_array_equal(blender.blend(x, y), per_pixel_intensities(x, y, 60, 40, min_alpha, steps))
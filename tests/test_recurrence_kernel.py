@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from harmonograph_mvc.benchmarks.common import CASES
+from harmonograph_mvc.models.harmonograph import Harmonograph, HarmonographParams
+from harmonograph_mvc.models.parallel_renderer import chunk_bounds, shutdown_pools
+from harmonograph_mvc.models.renderer import ImageBlender
+
+# Largest coordinate error in pixels of every kernel against the exact one
+MAX_ERROR = {'recurrence': 1e-6, 'recurrence32': 1e-3}
+SIZE = 999
+T_SAMPLES = 200_003
+# Not a multiple of the recurrence block, so that chunks start inside blocks
+CHUNK_SIZE = 1000
+
+
+@pytest.fixture(scope='module', autouse=True)
+def pools():
+    yield
+    shutdown_pools()
+
+
+def streamed_coords(harmonograph: Harmonograph, bounds: tuple, start: int = 0, stop: int = None) -> np.ndarray:
+    """Joins the coordinate chunks of iter_coords, dropping the sample every chunk repeats from the previous one."""
+    chunks = [coords for _, coords in harmonograph.iter_coords(SIZE, CHUNK_SIZE, start, stop, bounds)]
+    return np.concatenate([chunks[0]] + [coords[..., 1:] for coords in chunks[1:]], axis=-1)
+
+
+@pytest.mark.parametrize('case', ['lissajous', 'fast'])
+@pytest.mark.parametrize('kernel', MAX_ERROR)
+def test_coordinates_match_exact(case, kernel):
+    params = HarmonographParams(CASES[case], 0, 2000, T_SAMPLES)
+    exact, harmonograph = Harmonograph(params), Harmonograph(params, kernel)
+    bounds = exact.normalization_bounds(SIZE)
+    assert np.abs(harmonograph.get_coords(SIZE) - exact.get_coords(SIZE)).max() < MAX_ERROR[kernel]
+
+    # Streamed coordinates are normalized by the estimated bounds, so they are compared at the same bounds
+    exact_coords = streamed_coords(exact, bounds)
+    assert np.abs(streamed_coords(harmonograph, bounds) - exact_coords).max() < MAX_ERROR[kernel]
+    # The ranges of the parallel renderer's workers, each read with one point of overlap
+    for start, stop in chunk_bounds(T_SAMPLES - 1, 3):
+        coords = streamed_coords(harmonograph, bounds, start, stop + 1)
+        assert np.abs(coords - exact_coords[:, start:stop + 1]).max() < MAX_ERROR[kernel]
+
+
+@pytest.mark.parametrize('kernel', MAX_ERROR)
+def test_parallel_render_matches_serial(kernel):
+    harmonograph = Harmonograph(HarmonographParams(CASES['fast'], 0, 2000, T_SAMPLES), kernel)
+    hits = []
+    for workers in (1, 3):
+        blender = ImageBlender(SIZE + 1, SIZE + 1, workers=workers)
+        blender.accumulate_harmonograph(harmonograph, SIZE, chunk_size=CHUNK_SIZE)
+        hits.append(blender.hits)
+    np.testing.assert_array_equal(hits[0], hits[1])
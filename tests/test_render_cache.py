@@ -0,0 +1,53 @@
+import numpy as np
+
+from harmonograph_mvc.benchmarks.common import CASES
+from harmonograph_mvc.controllers.application_controller import ApplicationController
+from harmonograph_mvc.utils.render_cache import RenderCache
+
+
+def hit_counts(layers: int = 1, value: int = 1) -> np.ndarray:
+    """1 KB of hit counts per layer."""
+    return np.full((layers, 16, 16), value, dtype=np.uint32)
+
+
+def test_round_trip():
+    cache = RenderCache()
+    stored = hit_counts(3)
+    cache.put('key', stored)
+    assert cache.get('key', 3) is stored
+    # An entry with more layers serves requests for fewer, but not the other way around
+    assert cache.get('key', 1) is stored
+    assert cache.get('key', 4) is None
+    assert cache.get('other') is None
+    assert (cache.hits, cache.misses) == (2, 2)
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = RenderCache(max_bytes=3 * 1024)
+    for key in 'abc':
+        cache.put(key, hit_counts())
+    cache.get('a')
+    cache.put('d', hit_counts())
+    assert [key for key in 'abcd' if cache.get(key) is not None] == ['a', 'c', 'd']
+    assert cache.size == 3 * 1024
+
+
+def test_replacing_and_oversized_entries():
+    cache = RenderCache(max_bytes=2 * 1024)
+    cache.put('a', hit_counts())
+    cache.put('a', hit_counts(value=2))
+    assert cache.size == 1024 and cache.get('a')[0, 0, 0] == 2
+    # An entry larger than the whole cache is not stored, and leaves the others in place
+    cache.put('b', hit_counts(3))
+    assert cache.get('b') is None and cache.get('a') is not None
+
+
+def test_alpha_changes_reuse_the_cached_render():
+    controller = ApplicationController()
+    controller.set_harmonograph_params((np.array(CASES['lissajous']), [0, 500, 20_000], {}))
+    # generate_image returns the images with the time it took
+    first, _ = controller.generate_image(250, 250, False, 25, 45)
+    hits = controller.blender.hits
+    second, _ = controller.generate_image(250, 250, False, 100, 10)
+    assert controller.blender.hits is hits and controller.render_cache.hits == 1
+    assert (second['full'] >= first['full']).all() and (second['full'] > first['full']).any()
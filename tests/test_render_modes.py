@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from harmonograph_mvc.benchmarks.common import CASES
+from harmonograph_mvc.models.harmonograph import Harmonograph, HarmonographParams
+from harmonograph_mvc.models.rasterizer import alpha_lut, hits_to_intensities, splat_points
+from harmonograph_mvc.models.renderer import ImageBlender
+
+SIZE = 300
+T_SAMPLES = 50_001
+
+
+def densities(harmonograph: Harmonograph, mode: str, chunk_size: int, layers: int = 1) -> np.ndarray:
+    blender = ImageBlender(SIZE, SIZE, layers=layers, mode=mode)
+    blender.accumulate_harmonograph(harmonograph, SIZE - 1, chunk_size=chunk_size)
+    return blender.hits
+
+
+@pytest.mark.parametrize('mode', ['density', 'bilinear'])
+def test_every_sample_is_counted_once(mode):
+    harmonograph = Harmonograph(HarmonographParams(CASES['spiral'], 0, 500, T_SAMPLES))
+    hits = densities(harmonograph, mode, 4096, layers=3)
+    # Chunks repeat the previous chunk's last sample, which must not be counted twice
+    np.testing.assert_allclose(hits.sum(axis=(1, 2)), T_SAMPLES, rtol=1e-6)
+    whole = densities(harmonograph, mode, T_SAMPLES, layers=3)
+    if mode == 'density':
+        np.testing.assert_array_equal(hits, whole)
+    else:
+        np.testing.assert_allclose(hits, whole, atol=1e-4)
+
+
+def test_density_counts_the_pixel_of_every_sample():
+    harmonograph = Harmonograph(HarmonographParams(CASES['lissajous'], 0, 500, 10_001))
+    assert harmonograph.bounds_samples() == harmonograph.t_samples
+    x, y = harmonograph.get_coords(SIZE - 1).astype(np.int64)
+    expected, _, _ = np.histogram2d(x, y, bins=SIZE, range=[[0, SIZE], [0, SIZE]])
+    np.testing.assert_array_equal(densities(harmonograph, 'density', 4096)[0], expected)
+
+
+def test_bilinear_splatting_weights_samples_by_their_position():
+    hits = np.zeros((SIZE, SIZE), dtype=np.float32)
+    splat_points(hits, np.array([10.25, 20.0, 299.0]), np.array([30.5, 40.75, 299.0]), bilinear=True)
+    assert hits.sum() == 3
+    # The first sample is split between four pixels, the second between two rows, the last falls on the last pixel
+    np.testing.assert_array_equal(hits[10:12, 30:32], [[0.375, 0.375], [0.125, 0.125]])
+    np.testing.assert_array_equal(hits[20, 40:42], [0.25, 0.75])
+    assert hits[299, 299] == 1 and np.count_nonzero(hits) == 7
+
+
+def test_densities_map_to_intensities_like_hit_counts():
+    lut = alpha_lut(25, 10, 30)
+    counts = np.array([[0, 1, 2, 3, 30]])
+    np.testing.assert_array_equal(hits_to_intensities(counts.astype(np.float32), lut), hits_to_intensities(counts, lut))
+    # Fractional densities lie between the intensities of the neighbouring counts
+    np.testing.assert_array_equal(hits_to_intensities(np.array([[0.5, 1.5]], dtype=np.float32), lut), [[12, 30]])
+
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError, match='render mode'):
+        ImageBlender(SIZE, SIZE, mode='points')
@@ -0,0 +1,75 @@
+import os
+
+import numpy as np
+import pytest
+
+from harmonograph_mvc.utils.render_store import PresetLibrary, RenderStore
+
+
+def hit_counts(maximum, layers: int = 1, dtype=np.uint32) -> np.ndarray:
+    counts = np.zeros((layers, 16, 16), dtype=dtype)
+    counts[..., 0, 0] = maximum
+    return counts
+
+
+@pytest.mark.parametrize('maximum, dtype', [(255, np.uint8), (1000, np.uint16), (70_000, np.uint32)])
+def test_round_trip_in_the_narrowest_type(tmp_path, maximum, dtype):
+    store = RenderStore(str(tmp_path), version=1)
+    store.put(('key', 250), hit_counts(maximum, layers=2))
+    loaded = store.get(('key', 250), layers=2)
+    assert loaded.dtype == dtype and isinstance(loaded, np.memmap) and not loaded.flags.writeable
+    np.testing.assert_array_equal(loaded, hit_counts(maximum, layers=2))
+    # An entry with more layers serves requests for fewer, but not the other way around
+    assert store.get(('key', 250)) is not None and store.get(('key', 250), layers=3) is None
+
+
+def test_fractional_densities_are_kept(tmp_path):
+    store = RenderStore(str(tmp_path), version=1)
+    densities = hit_counts(2.5, dtype=np.float32)
+    store.put('key', densities)
+    loaded = store.get('key')
+    assert loaded.dtype == np.float32
+    np.testing.assert_array_equal(loaded, densities)
+
+
+def test_other_versions_and_keys_are_not_served(tmp_path):
+    RenderStore(str(tmp_path), version=1).put('key', hit_counts(3))
+    assert RenderStore(str(tmp_path), version=2).get('key') is None
+    assert RenderStore(str(tmp_path), version=1).get('other') is None
+
+
+def test_unreadable_files_are_misses(tmp_path):
+    store = RenderStore(str(tmp_path), version=1)
+    with open(store.path('key'), 'wb') as file:
+        file.write(b'not an array')
+    assert store.get('key') is None
+
+
+def test_least_recently_used_files_are_evicted(tmp_path):
+    store = RenderStore(str(tmp_path), version=1)
+    store.put('a', hit_counts(3))
+    store.put('b', hit_counts(3))
+    file_size = os.path.getsize(store.path('a'))
+    # Modification times are the last uses, made distinct here as puts in quick succession may share one
+    for age, key in enumerate('ab'):
+        os.utime(store.path(key), (1000 - age, 1000 - age))
+    store.get('b')
+
+    store.max_bytes = 2 * file_size
+    store.put('c', hit_counts(3))
+    assert [key for key in 'abc' if store.get(key) is not None] == ['b', 'c']
+    assert store.stats().startswith('store: 2 entries')
+
+
+def test_presets_and_session_persist(tmp_path):
+    path = str(tmp_path / 'presets.json')
+    library = PresetLibrary(path)
+    library.save('spiral', {'t_end': '500', 'kernel': 'exact'})
+    library.save('lissajous', {'t_end': '2000'})
+    library.delete('spiral')
+    library.save_session({'t_end': '1 + t'})
+
+    reloaded = PresetLibrary(path)
+    assert reloaded.names() == ['lissajous'] and reloaded.presets['lissajous'] == {'t_end': '2000'}
+    assert reloaded.session == {'t_end': '1 + t'}
+    assert PresetLibrary(str(tmp_path / 'missing.json')).names() == []
@@ -0,0 +1,41 @@
+import numpy as np
+
+from harmonograph_mvc.benchmarks.common import CASES, MIN_ALPHA, STEPS
+from harmonograph_mvc.models.harmonograph import Harmonograph, HarmonographParams
+from harmonograph_mvc.models.renderer import ImageBlender
+from harmonograph_mvc.models.sweep_renderer import render_contact_sheet, sweep_params
+from harmonograph_mvc.utils.expressions import compile_expression
+
+THUMB_SIZE = 64
+# The frequency of the first pendulum along x
+CELL = (0, 0, 2)
+
+
+def test_sweep_sets_the_cell_of_every_set():
+    params = HarmonographParams(CASES['lissajous'], 0, 500, 1000,
+                                expressions={CELL: compile_expression('1 + t / 1000'),
+                                             (1, 1, 0): compile_expression('0.5')})
+    values = np.linspace(1, 2, 5)
+    swept = sweep_params(params, CELL, values)
+    assert swept.pendulums.shape == (5, *params.pendulums.shape)
+    np.testing.assert_array_equal(swept.pendulums[(slice(None), *CELL)], values)
+    # Every other cell keeps its value, and the swept cell no longer follows its expression
+    np.testing.assert_array_equal(np.delete(swept.pendulums.reshape(5, -1), 2, axis=1),
+                                  np.delete(np.tile(params.pendulums.reshape(-1), (5, 1)), 2, axis=1))
+    assert list(swept.expressions) == [(1, 1, 0)]
+
+
+def test_thumbnails_equal_individual_renders():
+    params = HarmonographParams(CASES['lissajous'], 0, 500, 10_001)
+    swept = sweep_params(params, CELL, np.linspace(1, 3, 7))
+    sheet, origins = render_contact_sheet(swept, THUMB_SIZE, min_alpha=MIN_ALPHA, steps=STEPS, chunk_size=4096)
+
+    drawn = np.zeros(sheet.shape, dtype=bool)
+    for pendulums, (x, y) in zip(swept.pendulums, origins):
+        harmonograph = Harmonograph(HarmonographParams(pendulums, params.t_start, params.t_end, params.t_samples))
+        blender = ImageBlender(THUMB_SIZE, THUMB_SIZE, MIN_ALPHA, STEPS)
+        blender.accumulate_harmonograph(harmonograph, THUMB_SIZE - 1)
+        np.testing.assert_array_equal(sheet[x:x + THUMB_SIZE, y:y + THUMB_SIZE], blender.get_image())
+        drawn[x:x + THUMB_SIZE, y:y + THUMB_SIZE] = True
+    # Nothing is drawn in the gaps between the thumbnails or in the unused cells of the grid
+    assert not sheet[~drawn].any()